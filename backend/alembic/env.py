@@ -6,7 +6,7 @@ from alembic import context
 
 from app.config import settings
 from app.database import Base
-from app.models import User, Group, GroupMember, Message, FileAttachment  # noqa
+from app.models import User, Group, GroupMember, Message, FileAttachment, EventPayload, UploadSession  # noqa
 
 config = context.config
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
@@ -0,0 +1,30 @@
+"""Composite index for keyset message pagination
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_group_created_id",
+        "messages",
+        ["group_id", "created_at", "id"],
+    )
+    # Leading column of the composite index; the single-column one is redundant
+    op.drop_index("ix_messages_group_id", table_name="messages")
+
+
+def downgrade() -> None:
+    op.create_index("ix_messages_group_id", "messages", ["group_id"])
+    op.drop_index("ix_messages_group_created_id", table_name="messages")
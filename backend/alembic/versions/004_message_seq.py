@@ -0,0 +1,52 @@
+"""Per-group message sequence numbers
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "groups",
+        sa.Column("last_seq", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.add_column("messages", sa.Column("seq", sa.BigInteger(), nullable=True))
+
+    # Number existing history in the order it is displayed
+    op.execute(
+        """
+        UPDATE messages m SET seq = numbered.seq
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY group_id ORDER BY created_at, id) AS seq
+            FROM messages
+        ) AS numbered
+        WHERE m.id = numbered.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE groups g SET last_seq = heads.seq
+        FROM (SELECT group_id, max(seq) AS seq FROM messages GROUP BY group_id) AS heads
+        WHERE g.id = heads.group_id
+        """
+    )
+
+    op.alter_column("messages", "seq", nullable=False)
+    op.create_unique_constraint("uq_messages_group_seq", "messages", ["group_id", "seq"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_messages_group_seq", "messages", type_="unique")
+    op.drop_column("messages", "seq")
+    op.drop_column("groups", "last_seq")
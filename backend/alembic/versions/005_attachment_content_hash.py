@@ -0,0 +1,31 @@
+"""Content hash on file attachments for deduplicated storage
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NULL for uploads stored before content addressing; those keep their uuid names
+    op.add_column(
+        "file_attachments", sa.Column("content_hash", sa.String(64), nullable=True)
+    )
+    op.create_index(
+        "ix_file_attachments_content_hash", "file_attachments", ["content_hash"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_file_attachments_content_hash", table_name="file_attachments")
+    op.drop_column("file_attachments", "content_hash")
@@ -0,0 +1,32 @@
+"""Image preview metadata on file attachments
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("file_attachments", sa.Column("width", sa.Integer(), nullable=True))
+    op.add_column("file_attachments", sa.Column("height", sa.Integer(), nullable=True))
+    op.add_column(
+        "file_attachments", sa.Column("thumbnail_filename", sa.String(255), nullable=True)
+    )
+    op.add_column("file_attachments", sa.Column("placeholder", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("file_attachments", "placeholder")
+    op.drop_column("file_attachments", "thumbnail_filename")
+    op.drop_column("file_attachments", "height")
+    op.drop_column("file_attachments", "width")
@@ -0,0 +1,39 @@
+"""Full-text search vector on messages
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 'simple': no stemming or stop words, so Uzbek, Russian and English
+    # chat text is indexed the same way. Adding a stored generated column
+    # rewrites the table once.
+    op.add_column(
+        "messages",
+        sa.Column(
+            "search_vector",
+            TSVECTOR(),
+            sa.Computed("to_tsvector('simple', coalesce(content, ''))", persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_messages_search_vector", "messages", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_search_vector", table_name="messages")
+    op.drop_column("messages", "search_vector")
@@ -0,0 +1,40 @@
+"""Uploader of file attachments, to scope content-hash dedupe
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL, so no one can dedupe against them
+    op.add_column(
+        "file_attachments",
+        sa.Column(
+            "uploaded_by",
+            UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_file_attachments_uploaded_by_content_hash",
+        "file_attachments",
+        ["uploaded_by", "content_hash"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_file_attachments_uploaded_by_content_hash", table_name="file_attachments")
+    op.drop_column("file_attachments", "uploaded_by")
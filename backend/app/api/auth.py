@@ -10,9 +10,10 @@ from app.models.user import User
 from app.models.group import Group
 from app.models.group_member import GroupMember
 from app.schemas.auth import RegisterRequest, ChangePasswordRequest, TokenResponse
-from app.schemas.user import UserResponse
 from app.utils.security import hash_password, verify_password, create_access_token
 from app.api.deps import get_current_user
+from app.services.user_cache import user_cache
+from app.services.presence import presence
 
 router = APIRouter()
 
@@ -35,7 +36,7 @@ async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
 
     user = User(
         username=data.username,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password(data.password),
         display_name=data.display_name,
         avatar_color=random.choice(AVATAR_COLORS),
     )
@@ -49,12 +50,13 @@ async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
         db.add(GroupMember(group_id=group.id, user_id=user.id))
 
     await db.flush()
+    user_cache.put(user)
 
     token = create_access_token(user.id, user.username)
     return {
         "access_token": token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user).model_dump(mode="json"),
+        "user": presence.user_response(user).model_dump(mode="json"),
     }
 
 
@@ -67,17 +69,18 @@ async def login(
         select(User).where(User.username == form_data.username)
     )
     user = result.scalar_one_or_none()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    user_cache.put(user)
 
     token = create_access_token(user.id, user.username)
     return {
         "access_token": token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user).model_dump(mode="json"),
+        "user": presence.user_response(user).model_dump(mode="json"),
     }
 
 
@@ -87,12 +90,14 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    if not verify_password(data.current_password, current_user.password_hash):
+    if not await verify_password(data.current_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
 
-    current_user.password_hash = hash_password(data.new_password)
-    await db.flush()
+    current_user.password_hash = await hash_password(data.new_password)
+    # Commit before evicting, so no worker re-caches the old row
+    await db.commit()
+    await user_cache.changed(current_user)
     return {"message": "Password changed successfully"}
@@ -1,37 +1,39 @@
-import uuid
-
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from jose import JWTError
 
-from app.database import get_db
-from app.utils.security import decode_access_token
+from app.database import get_db, get_read_db
 from app.models.user import User
+from app.services.auth_cache import auth_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+async def _load_user(token: str, db: AsyncSession) -> User:
+    try:
+        user = await auth_cache.principal(db, token)
+    except (JWTError, KeyError, ValueError):
+        user = None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = decode_access_token(token)
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    result = await db.execute(select(User).where(User.id == uuid.UUID(user_id)))
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise credentials_exception
-    return user
+    return await _load_user(token, db)
+
+
+async def get_current_user_readonly(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """For read-only routes: shares their read session, so the request never touches the primary."""
+    return await _load_user(token, db)
@@ -1,15 +1,37 @@
+import os
 import uuid
+from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from fastapi.responses import FileResponse
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    File,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.file_attachment import FileAttachment
-from app.schemas.message import FileAttachmentResponse
-from app.utils.file_utils import save_upload_file, get_file_path
+from app.models.upload_session import UploadSession
+from app.schemas.message import (
+    FileAttachmentResponse,
+    FileDedupeRequest,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+from app.services.attachment_cache import attachment_cache
+from app.services.resumable_uploads import ChunkMismatch, UploadClosed, resumable_uploads
+from app.services.thumbnails import thumbnails
+from app.utils.file_utils import save_stream, save_upload_file, get_file_path, touch_blob
+from app.utils.http_files import IMMUTABLE, REVALIDATE, accel_redirect_response, file_response
 from app.api.deps import get_current_user
 
 router = APIRouter()
@@ -17,42 +39,309 @@ router = APIRouter()
 
 @router.post("/upload", response_model=FileAttachmentResponse)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        stored_filename, file_size, mime_type = await save_upload_file(file)
+        stored_filename, file_size, mime_type, content_hash = await save_upload_file(file)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
 
     attachment = FileAttachment(
         original_filename=file.filename or "unnamed",
         stored_filename=stored_filename,
+        content_hash=content_hash,
+        uploaded_by=current_user.id,
         file_size=file_size,
         mime_type=mime_type,
     )
     db.add(attachment)
     await db.flush()
+    background_tasks.add_task(thumbnails.process, attachment)
 
     return attachment
 
 
-@router.get("/{file_id}")
-async def download_file(
-    file_id: uuid.UUID,
+@router.post("/upload/raw", response_model=FileAttachmentResponse)
+async def upload_raw(
+    background_tasks: BackgroundTasks,
+    request: Request,
+    filename: str = Query(min_length=1, max_length=255),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # The body is the file itself, streamed straight into storage: no
+    # multipart parsing and no spooled temporary copy.
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Max size: {settings.MAX_FILE_SIZE // (1024*1024)}MB",
+        )
+    # Give the connection back while the body streams in
+    await db.commit()
+    try:
+        stored_filename, file_size, content_hash = await save_stream(request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    content_type = request.headers.get("content-type", "").partition(";")[0].strip()
+    attachment = FileAttachment(
+        original_filename=filename,
+        stored_filename=stored_filename,
+        content_hash=content_hash,
+        uploaded_by=current_user.id,
+        file_size=file_size,
+        mime_type=content_type[:100] or "application/octet-stream",
+    )
+    db.add(attachment)
+    await db.flush()
+    background_tasks.add_task(thumbnails.process, attachment)
+
+    return attachment
+
+
+@router.post("/dedupe", response_model=FileAttachmentResponse)
+async def dedupe_file(
+    background_tasks: BackgroundTasks,
+    data: FileDedupeRequest,
+    current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    # A hit means the caller already uploaded these bytes: record a new
+    # attachment for them and let the client skip the upload. 404 = upload as
+    # usual. Only the caller's own uploads count, or knowing a hash would be
+    # enough to get a copy of anyone's file.
     result = await db.execute(
-        select(FileAttachment).where(FileAttachment.id == file_id)
+        select(FileAttachment.stored_filename, FileAttachment.file_size)
+        .where(
+            FileAttachment.uploaded_by == current_user.id,
+            FileAttachment.content_hash == data.content_hash,
+        )
+        .limit(1)
+    )
+    blob = result.first()
+    if not blob or not touch_blob(blob.stored_filename):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not stored")
+
+    attachment = FileAttachment(
+        original_filename=data.filename,
+        stored_filename=blob.stored_filename,
+        content_hash=data.content_hash,
+        uploaded_by=current_user.id,
+        file_size=blob.file_size,
+        mime_type=data.mime_type,
+    )
+    db.add(attachment)
+    await db.flush()
+    background_tasks.add_task(thumbnails.process, attachment)
+
+    return attachment
+
+
+def _upload_status(session: UploadSession) -> UploadSessionResponse:
+    received = resumable_uploads.received(session)
+    return UploadSessionResponse(
+        upload_id=session.id,
+        file_size=session.file_size,
+        chunk_size=session.chunk_size,
+        received_chunks=received,
+        received_bytes=resumable_uploads.received_bytes(session, received),
+        expires_at=session.expires_at,
+    )
+
+
+async def _get_upload(
+    db: AsyncSession, upload_id: uuid.UUID, user: User, lock: bool = False
+) -> UploadSession:
+    query = select(UploadSession).where(
+        UploadSession.id == upload_id, UploadSession.user_id == user.id
+    )
+    if lock:
+        query = query.with_for_update()
+    session = (await db.execute(query)).scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return session
+
+
+def _upload_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    data: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if data.file_size > settings.MAX_RESUMABLE_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Max size: {settings.MAX_RESUMABLE_FILE_SIZE // (1024*1024)}MB",
+        )
+    session = UploadSession(
+        user_id=current_user.id,
+        original_filename=data.filename,
+        mime_type=data.mime_type,
+        file_size=data.file_size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        expires_at=_upload_expiry(),
+    )
+    db.add(session)
+    await db.flush()
+    resumable_uploads.create(session)
+    return _upload_status(session)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(
+    upload_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    session = await _get_upload(db, upload_id, current_user)
+    return _upload_status(session)
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def put_upload_chunk(
+    upload_id: uuid.UUID,
+    request: Request,
+    offset: int = Query(ge=0, description="Byte offset of the chunk; a multiple of chunk_size"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    session = await _get_upload(db, upload_id, current_user)
+    # Give the connection back while the body trickles in
+    await db.commit()
+    if offset % session.chunk_size or offset >= session.file_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Offset must be a multiple of chunk_size inside the file",
+        )
+    try:
+        await resumable_uploads.write_chunk(session, offset // session.chunk_size, request.stream())
+    except ChunkMismatch as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadClosed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Upload was completed or aborted"
+        )
+
+    session.expires_at = _upload_expiry()
+    await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session.id)
+        .values(expires_at=session.expires_at)
     )
-    attachment = result.scalar_one_or_none()
+    return _upload_status(session)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileAttachmentResponse)
+async def complete_upload(
+    background_tasks: BackgroundTasks,
+    upload_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # The row lock makes a concurrent second "complete" wait, then 404 or 409
+    session = await _get_upload(db, upload_id, current_user, lock=True)
+    missing = resumable_uploads.chunk_count(session) - len(resumable_uploads.received(session))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"{missing} chunks not uploaded yet"
+        )
+    if not resumable_uploads.seal(session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Upload is already being completed"
+        )
+
+    # Sealed, so no new chunk can start, and finish stores a private copy
+    # that a chunk still writing can't change: hash up to 2 GB without
+    # holding the row lock or a connection.
+    await db.commit()
+    try:
+        stored_filename, content_hash = await resumable_uploads.finish(session)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    attachment = FileAttachment(
+        original_filename=session.original_filename,
+        stored_filename=stored_filename,
+        content_hash=content_hash,
+        uploaded_by=current_user.id,
+        file_size=session.file_size,
+        mime_type=session.mime_type,
+    )
+    db.add(attachment)
+    await db.execute(delete(UploadSession).where(UploadSession.id == session.id))
+    await db.flush()
+    background_tasks.add_task(thumbnails.process, attachment)
+
+    return attachment
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    session = await _get_upload(db, upload_id, current_user)
+    await db.delete(session)
+    await db.flush()
+    resumable_uploads.discard(session.id)
+
+
+@router.get("/{file_id}")
+async def download_file(
+    file_id: uuid.UUID,
+    request: Request,
+    variant: str | None = Query(
+        None, pattern="^preview$", description="preview: downscaled JPEG of an image"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    attachment = await attachment_cache.get(db, file_id)
     if not attachment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-    file_path = get_file_path(attachment.stored_filename)
-    return FileResponse(
+    stored_filename = attachment.stored_filename
+    media_type = attachment.mime_type
+    cache_control = IMMUTABLE
+    if variant == "preview":
+        if attachment.thumbnail_filename:
+            stored_filename = attachment.thumbnail_filename
+            media_type = "image/jpeg"
+        else:
+            # No preview yet (or it failed to render): send the original, but
+            # keep it from being cached as the preview for good
+            cache_control = REVALIDATE
+
+    if settings.FILE_ACCEL_REDIRECT:
+        return accel_redirect_response(
+            settings.FILE_ACCEL_REDIRECT.rstrip("/") + "/" + stored_filename,
+            media_type=media_type,
+            filename=attachment.original_filename,
+            cache_control=cache_control,
+        )
+
+    file_path = get_file_path(stored_filename)
+    try:
+        size = os.stat(file_path).st_size
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return file_response(
+        request,
         path=file_path,
+        size=size,
+        media_type=media_type,
+        # Stored names are unique and their bytes never change, so the name
+        # alone is a strong validator.
+        etag=f'"{stored_filename}"',
+        last_modified=attachment.created_at,
         filename=attachment.original_filename,
-        media_type=attachment.mime_type,
+        cache_control=cache_control,
     )
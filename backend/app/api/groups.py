@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.group import Group
 from app.models.group_member import GroupMember
@@ -15,16 +15,17 @@ from app.schemas.group import (
     GroupResponse,
     GroupDetailResponse,
 )
-from app.schemas.user import UserResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_readonly
+from app.services.membership import membership
+from app.services.presence import presence
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[GroupResponse])
 async def list_my_groups(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db),
 ):
     result = await db.execute(
         select(Group)
@@ -50,31 +51,24 @@ async def create_group(
     await db.flush()
 
     # Add creator as member
-    db.add(GroupMember(group_id=group.id, user_id=current_user.id))
-
-    # Add other members
-    for member_id in data.member_ids:
-        if member_id != current_user.id:
-            db.add(GroupMember(group_id=group.id, user_id=member_id))
-
-    await db.flush()
+    member_ids = {current_user.id, *data.member_ids}
+    for member_id in member_ids:
+        db.add(GroupMember(group_id=group.id, user_id=member_id))
+
+    # Commit before telling the membership index, so no worker sees a
+    # membership that could still roll back
+    await db.commit()
+    await membership.added(group.id, member_ids)
     return group
 
 
 @router.get("/{group_id}", response_model=GroupDetailResponse)
 async def get_group(
     group_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    # Check membership
-    membership = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_id == group_id,
-            GroupMember.user_id == current_user.id,
-        )
-    )
-    if not membership.scalar_one_or_none():
+    if not await membership.is_member(current_user.id, group_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member")
 
     result = await db.execute(
@@ -94,7 +88,7 @@ async def get_group(
         created_by=group.created_by,
         created_at=group.created_at,
         members=[
-            UserResponse.model_validate(m.user)
+            presence.user_response(m.user)
             for m in group.members
         ],
     )
@@ -115,7 +109,14 @@ async def delete_group(
     if group.created_by != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only creator can delete")
 
+    result = await db.execute(
+        select(GroupMember.user_id).where(GroupMember.group_id == group_id)
+    )
+    member_ids = result.scalars().all()
+
     await db.delete(group)
+    await db.commit()
+    await membership.removed(group_id, member_ids)
 
 
 @router.post("/{group_id}/members", status_code=status.HTTP_201_CREATED)
@@ -125,16 +126,10 @@ async def add_members(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    # Check membership
-    membership = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_id == group_id,
-            GroupMember.user_id == current_user.id,
-        )
-    )
-    if not membership.scalar_one_or_none():
+    if not await membership.is_member(current_user.id, group_id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member")
 
+    added = []
     for user_id in data.user_ids:
         existing = await db.execute(
             select(GroupMember).where(
@@ -144,7 +139,10 @@ async def add_members(
         )
         if not existing.scalar_one_or_none():
             db.add(GroupMember(group_id=group_id, user_id=user_id))
+            added.append(user_id)
 
+    await db.commit()
+    await membership.added(group_id, added)
     return {"message": "Members added"}
 
 
@@ -175,3 +173,5 @@ async def remove_member(
     member = result.scalar_one_or_none()
     if member:
         await db.delete(member)
+        await db.commit()
+        await membership.removed(group_id, [user_id])
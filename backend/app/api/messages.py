@@ -1,53 +1,101 @@
 import uuid
-from datetime import datetime
+from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models.user import User
 from app.models.message import Message
-from app.models.group_member import GroupMember
-from app.schemas.message import MessageResponse
-from app.api.deps import get_current_user
+from app.schemas.message import MessagePage, SearchPage, SyncRequest, SyncResponse
+from app.api.deps import get_current_user_readonly
+from app.services.membership import membership
+from app.services.message_search import search_messages
+from app.services.message_sync import serialize_messages, sync_messages
+from app.utils.pagination import decode_message_cursor, encode_message_cursor
 
 router = APIRouter()
 
 
-@router.get("/{group_id}", response_model=list[MessageResponse])
+@router.post("/sync", response_model=SyncResponse)
+async def sync(
+    data: SyncRequest,
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return SyncResponse(groups=await sync_messages(db, current_user.id, data.cursors, data.limit))
+
+
+@router.get("/search", response_model=SearchPage)
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    group_id: uuid.UUID | None = Query(None, description="Only this group; default all of yours"),
+    sort: Literal["relevance", "recent"] = "relevance",
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db),
+):
+    groups = await membership.groups_of(current_user.id)
+    if group_id is not None:
+        if group_id not in groups:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member")
+        groups = {group_id}
+    try:
+        return await search_messages(db, groups, q, sort, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@router.get("/{group_id}", response_model=MessagePage)
 async def get_messages(
     group_id: uuid.UUID,
-    before: datetime | None = Query(None),
-    limit: int = Query(50, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    before: str | None = Query(None, description="Cursor: page of messages older than it"),
+    after: str | None = Query(None, description="Cursor: page of messages newer than it"),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    # Check membership
-    membership = await db.execute(
-        select(GroupMember).where(
-            GroupMember.group_id == group_id,
-            GroupMember.user_id == current_user.id,
-        )
-    )
-    if not membership.scalar_one_or_none():
+    if before and after:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either before or after")
+    # No db: a membership miss loads from the primary, never a lagging replica
+    if not await membership.is_member(current_user.id, group_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member")
 
+    try:
+        cursor = decode_message_cursor(before or after) if (before or after) else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # Keyset pagination on (created_at, id), served by ix_messages_group_created_id.
+    # The id tie-break keeps pages exact when timestamps collide.
+    key = tuple_(Message.created_at, Message.id)
     query = (
         select(Message)
-        .options(
-            selectinload(Message.sender),
-            selectinload(Message.file_attachment),
-        )
+        .options(selectinload(Message.file_attachment))
         .where(Message.group_id == group_id)
-        .order_by(Message.created_at.desc())
-        .limit(limit)
+        .limit(limit + 1)
     )
-
-    if before:
-        query = query.where(Message.created_at < before)
+    if after:
+        query = query.where(key > tuple_(*cursor)).order_by(Message.created_at, Message.id)
+    else:
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+        if before:
+            query = query.where(key < tuple_(*cursor))
 
     result = await db.execute(query)
     messages = result.scalars().all()
-    return list(reversed(messages))
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not after:
+        messages = list(reversed(messages))
+
+    return MessagePage(
+        messages=await serialize_messages(db, messages),
+        older_cursor=encode_message_cursor(messages[0].created_at, messages[0].id) if messages else None,
+        newer_cursor=encode_message_cursor(messages[-1].created_at, messages[-1].id) if messages else None,
+        has_older=bool(after) or has_more,
+        has_newer=bool(before) or (bool(after) and has_more),
+    )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from app.models.user import User
+from app.services.user_cache import user_cache
+from app.services.membership import membership
+from app.services.attachment_cache import attachment_cache
+from app.services.attachment_gc import attachment_gc
+from app.services.auth_cache import auth_cache
+from app.services.presence import presence
+from app.ws.manager import manager
+from app.api.deps import get_current_user_readonly
+from app.utils.security import password_pool
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_stats(current_user: User = Depends(get_current_user_readonly)):
+    return {
+        "user_cache": user_cache.stats(),
+        "membership": membership.stats(),
+        "auth": auth_cache.stats(),
+        "attachments": attachment_cache.stats(),
+        "attachment_gc": attachment_gc.stats(),
+        "presence": presence.stats(),
+        "ws_compression": manager.compression_stats(),
+        "password_pool": password_pool.stats(),
+    }
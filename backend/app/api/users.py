@@ -2,28 +2,31 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models.user import User
 from app.schemas.user import UserResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_readonly
+from app.services.presence import presence
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def get_me(current_user: User = Depends(get_current_user_readonly)):
+    return presence.user_response(current_user)
 
 
 @router.get("/", response_model=list[UserResponse])
-async def list_users(db: AsyncSession = Depends(get_db)):
+async def list_users(db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(select(User).order_by(User.display_name))
-    return result.scalars().all()
+    return [presence.user_response(user) for user in result.scalars()]
 
 
 @router.get("/online", response_model=list[UserResponse])
-async def list_online_users(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(User).where(User.is_online == True).order_by(User.display_name)
+async def list_online_users(db: AsyncSession = Depends(get_read_db)):
+    profiles = await user_cache.get_many(db, presence.online_user_ids())
+    return sorted(
+        (presence.user_response(profile) for profile in profiles.values()),
+        key=lambda user: user.display_name,
     )
-    return result.scalars().all()
@@ -14,6 +14,21 @@ AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Reads run in autocommit on connections whose transactions are forced
+# read-only: no BEGIN/COMMIT round trips, and a stray write fails loudly.
+read_engine = create_async_engine(
+    settings.DATABASE_READ_URL or settings.DATABASE_URL,
+    pool_size=settings.READ_POOL_SIZE,
+    max_overflow=settings.READ_POOL_MAX_OVERFLOW,
+    echo=False,
+    isolation_level="AUTOCOMMIT",
+    connect_args={"server_settings": {"default_transaction_read_only": "on"}},
+)
+
+ReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+)
+
 
 class Base(DeclarativeBase):
     pass
@@ -27,3 +42,9 @@ async def get_db():
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_read_db():
+    """Session for handlers that only read; nothing is committed."""
+    async with ReadSessionLocal() as session:
+        yield session
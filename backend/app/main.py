@@ -1,19 +1,32 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import select
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, text
 
-from app.database import engine, AsyncSessionLocal
+from app.database import engine, read_engine, AsyncSessionLocal
 from app.models.group import Group
-from app.api import auth, users, groups, messages, files
+from app.api import auth, users, groups, messages, files, stats
 from app.ws.router import router as ws_router
+from app.ws.manager import manager
+from app.services.attachment_gc import attachment_gc
+from app.services.message_writer import message_writer
+from app.services.presence import presence
+from app.services.resumable_uploads import resumable_uploads
+from app.services.thumbnails import thumbnails
+from app.services.typing import typing_aggregator
+from app.utils.security import PasswordPoolBusy
+
+# Arbitrary app-wide key so concurrently starting workers seed only once
+SEED_LOCK_KEY = 726301
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Seed global "General" group if it doesn't exist
     async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEED_LOCK_KEY})
         result = await db.execute(select(Group).where(Group.is_global == True))
         if not result.scalar_one_or_none():
             global_group = Group(
@@ -23,12 +36,37 @@ async def lifespan(app: FastAPI):
             )
             db.add(global_group)
             await db.commit()
+    await manager.start()
+    await presence.start()
+    await typing_aggregator.start()
+    await message_writer.start()
+    await resumable_uploads.start()
+    await thumbnails.start()
+    await attachment_gc.start()
     yield
+    await attachment_gc.stop()
+    await thumbnails.stop()
+    await resumable_uploads.stop()
+    await message_writer.stop()
+    await typing_aggregator.stop()
+    await presence.stop()
+    await manager.stop()
     await engine.dispose()
+    await read_engine.dispose()
 
 
 app = FastAPI(title="LAN Chat", lifespan=lifespan)
 
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -42,4 +80,5 @@ app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(groups.router, prefix="/api/groups", tags=["groups"])
 app.include_router(messages.router, prefix="/api/messages", tags=["messages"])
 app.include_router(files.router, prefix="/api/files", tags=["files"])
+app.include_router(stats.router, prefix="/api/stats", tags=["stats"])
 app.include_router(ws_router)
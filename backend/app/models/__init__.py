@@ -3,5 +3,7 @@ from app.models.group import Group
 from app.models.group_member import GroupMember
 from app.models.message import Message
 from app.models.file_attachment import FileAttachment
+from app.models.event_payload import EventPayload
+from app.models.upload_session import UploadSession
 
-__all__ = ["User", "Group", "GroupMember", "Message", "FileAttachment"]
+__all__ = ["User", "Group", "GroupMember", "Message", "FileAttachment", "EventPayload", "UploadSession"]
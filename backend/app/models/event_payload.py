@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Text, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class EventPayload(Base):
+    """WebSocket event too large for a NOTIFY payload, fetched by id on the other workers."""
+
+    __tablename__ = "ws_event_payloads"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
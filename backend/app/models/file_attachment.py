@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, BigInteger, DateTime, ForeignKey
+from sqlalchemy import String, BigInteger, Integer, Text, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,6 +10,9 @@ from app.database import Base
 
 class FileAttachment(Base):
     __tablename__ = "file_attachments"
+    __table_args__ = (
+        Index("ix_file_attachments_uploaded_by_content_hash", "uploaded_by", "content_hash"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -22,8 +25,19 @@ class FileAttachment(Base):
     )
     original_filename: Mapped[str] = mapped_column(String(255), nullable=False)
     stored_filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    # SHA-256 of the bytes; rows sharing it share one blob (their count is its refcount)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    # Dedupe only reuses blobs the caller has uploaded, so a hash alone grants nothing
+    uploaded_by: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
     file_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
     mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Filled in for images by the background preview pipeline
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    thumbnail_filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    placeholder: Mapped[str | None] = mapped_column(Text, nullable=True)  # tiny blurred data URL
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
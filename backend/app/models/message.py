@@ -1,15 +1,34 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, Text, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger,
+    Computed,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
 
+# Text search configuration of search_vector; queries must use the same one
+SEARCH_CONFIG = "simple"
+
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination over a group's history: (created_at, id) is the cursor
+        Index("ix_messages_group_created_id", "group_id", "created_at", "id"),
+        # Per-group sequence for reconnect sync; also serves "seq > last_seen" scans
+        UniqueConstraint("group_id", "seq", name="uq_messages_group_seq"),
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -18,14 +37,21 @@ class Message(Base):
         UUID(as_uuid=True),
         ForeignKey("groups.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
+    # Assigned from groups.last_seq by the message writer, gap-free per group
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
     sender_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True,
     )
     content: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Maintained by Postgres; deferred so ordinary message loads skip it
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', coalesce(content, ''))", persisted=True),
+        deferred=True,
+    )
     message_type: Mapped[str] = mapped_column(
         String(20), nullable=False, default="text"
     )
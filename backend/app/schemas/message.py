@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.user import UserResponse
 
@@ -11,13 +11,41 @@ class FileAttachmentResponse(BaseModel):
     original_filename: str
     file_size: int
     mime_type: str
+    # Images only, once the preview is rendered (shortly after upload)
+    width: int | None = None
+    height: int | None = None
+    placeholder: str | None = None
 
     model_config = {"from_attributes": True}
 
 
+class FileDedupeRequest(BaseModel):
+    # SHA-256 of the file the client is about to upload, lowercase hex
+    content_hash: str = Field(pattern=r"^[0-9a-f]{64}$")
+    filename: str = Field(min_length=1, max_length=255)
+    mime_type: str = Field("application/octet-stream", max_length=100)
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    mime_type: str = Field("application/octet-stream", max_length=100)
+    file_size: int = Field(gt=0)
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: uuid.UUID
+    file_size: int
+    # PUT chunk i at offset i * chunk_size; every chunk but the last is full size
+    chunk_size: int
+    received_chunks: list[int]
+    received_bytes: int
+    expires_at: datetime
+
+
 class MessageResponse(BaseModel):
     id: uuid.UUID
     group_id: uuid.UUID
+    seq: int
     sender_id: uuid.UUID | None
     sender: UserResponse | None = None
     content: str | None
@@ -26,3 +54,36 @@ class MessageResponse(BaseModel):
     file_attachment: FileAttachmentResponse | None = None
 
     model_config = {"from_attributes": True}
+
+
+class MessagePage(BaseModel):
+    messages: list[MessageResponse]
+    # Pass as ?before= for older history / ?after= to catch up; null on an empty page
+    older_cursor: str | None = None
+    newer_cursor: str | None = None
+    has_older: bool
+    has_newer: bool
+
+
+class SearchPage(BaseModel):
+    # Best match first (sort=relevance) or newest first (sort=recent)
+    messages: list[MessageResponse]
+    # Pass as ?cursor= with the same q and sort for the next page
+    next_cursor: str | None = None
+
+
+class SyncRequest(BaseModel):
+    # group_id -> highest seq the client already has (0 for none)
+    cursors: dict[uuid.UUID, int]
+    limit: int = Field(100, ge=1, le=500)  # per group
+
+
+class GroupSync(BaseModel):
+    group_id: uuid.UUID
+    messages: list[MessageResponse]
+    # More than `limit` were missed; sync again from the last seq returned
+    has_more: bool
+
+
+class SyncResponse(BaseModel):
+    groups: list[GroupSync]
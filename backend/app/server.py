@@ -0,0 +1,16 @@
+import os
+
+import uvicorn
+
+from app.ws.compression import DeflateWebSocketProtocol
+
+if __name__ == "__main__":
+    # Started from Python rather than the uvicorn CLI, which cannot take a
+    # custom WebSocket protocol class.
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        ws=DeflateWebSocketProtocol,
+    )
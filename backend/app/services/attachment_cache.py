@@ -0,0 +1,80 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.file_attachment import FileAttachment
+from app.utils.cache import TTLCache
+from app.ws.manager import manager
+
+
+@dataclass(frozen=True, slots=True)
+class AttachmentInfo:
+    """What a download needs from a file_attachments row."""
+
+    id: uuid.UUID
+    original_filename: str
+    stored_filename: str
+    file_size: int
+    mime_type: str
+    created_at: datetime
+    thumbnail_filename: str | None
+
+
+class AttachmentCache:
+    """Process-local cache of attachment metadata for GET /api/files/{id}.
+
+    Attachment rows only change once, when an image's preview is ready, and
+    are deleted by the garbage collector; both evict them on every worker.
+    The TTL bounds how long a row removed some other way (a cascaded message
+    delete) keeps resolving.
+    """
+
+    def __init__(self):
+        self._cache: TTLCache[uuid.UUID, AttachmentInfo] = TTLCache(
+            settings.ATTACHMENT_CACHE_SIZE, settings.ATTACHMENT_CACHE_TTL
+        )
+
+    async def get(self, db: AsyncSession, file_id: uuid.UUID) -> AttachmentInfo | None:
+        info = self._cache.get(file_id)
+        if info is not None:
+            return info
+        result = await db.execute(
+            select(FileAttachment).where(FileAttachment.id == file_id)
+        )
+        attachment = result.scalar_one_or_none()
+        if attachment is None:
+            return None
+        info = AttachmentInfo(
+            id=attachment.id,
+            original_filename=attachment.original_filename,
+            stored_filename=attachment.stored_filename,
+            file_size=attachment.file_size,
+            mime_type=attachment.mime_type,
+            created_at=attachment.created_at,
+            thumbnail_filename=attachment.thumbnail_filename,
+        )
+        self._cache.set(file_id, info)
+        return info
+
+    def invalidate(self, file_id: uuid.UUID):
+        self._cache.pop(file_id)
+
+    async def changed(self, file_ids: Iterable[uuid.UUID]):
+        """Evict rows that were updated or deleted, on every worker."""
+        await manager.publish("attachment_changed", file_ids=[str(fid) for fid in file_ids])
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+    async def _on_attachment_changed(self, envelope: dict[str, Any]):
+        for raw_id in envelope["file_ids"]:
+            self.invalidate(uuid.UUID(raw_id))
+
+
+attachment_cache = AttachmentCache()
+manager.on("attachment_changed", attachment_cache._on_attachment_changed)
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, select, text
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models.file_attachment import FileAttachment
+from app.services.attachment_cache import attachment_cache
+from app.utils.file_utils import get_file_path, preview_name
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary app-wide key so only one worker collects at a time
+GC_LOCK_KEY = 726302
+SHARDS = [f"{i:02x}" for i in range(256)]
+
+
+class AttachmentGC:
+    """Incremental garbage collector for attachments and their blobs.
+
+    Each pass, run by one worker at a time:
+    1. deletes attachment rows that were never linked to a message within
+       ATTACHMENT_ORPHAN_TTL, and removes the blobs no row references any more;
+    2. scans the next top-level blob shard (the whole store every 256 passes)
+       for blobs without rows, such as those left by cascaded message deletes,
+       and clears stale temporary files.
+    Work is split into batches of GC_BATCH_SIZE with GC_BATCH_PAUSE_MS
+    between them and at most GC_MAX_BATCHES per pass; a shard the budget
+    did not cover is scanned again next pass. Only files untouched for
+    GC_GRACE are removed; reusing a blob touches it.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._shard = 0
+        self._stats = {"passes": 0, "rows_deleted": 0, "files_deleted": 0, "bytes_reclaimed": 0}
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return dict(self._stats)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.GC_INTERVAL)
+            try:
+                await self.collect()
+            except Exception:
+                logger.exception("Attachment garbage collection failed")
+
+    async def collect(self) -> dict[str, int] | None:
+        """One pass; returns what it reclaimed, or None if another worker holds the lock."""
+        async with engine.connect() as lock:
+            acquired = await lock.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": GC_LOCK_KEY}
+            )
+            await lock.commit()
+            if not acquired:
+                return None
+            try:
+                report = {"rows_deleted": 0, "files_deleted": 0, "bytes_reclaimed": 0}
+                budget = settings.GC_MAX_BATCHES
+                budget = await self._collect_rows(report, budget)
+                await self._collect_shard(report, budget)
+            finally:
+                await lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": GC_LOCK_KEY})
+                await lock.commit()
+
+        self._stats["passes"] += 1
+        for key, value in report.items():
+            self._stats[key] += value
+        if report["rows_deleted"] or report["files_deleted"]:
+            logger.info(
+                "Attachment GC: %d rows, %d files, %.1f MB reclaimed",
+                report["rows_deleted"],
+                report["files_deleted"],
+                report["bytes_reclaimed"] / (1024 * 1024),
+            )
+        return report
+
+    async def _pause(self):
+        await asyncio.sleep(settings.GC_BATCH_PAUSE_MS / 1000)
+
+    async def _collect_rows(self, report: dict[str, int], budget: int) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.ATTACHMENT_ORPHAN_TTL)
+        while budget > 0:
+            budget -= 1
+            async with AsyncSessionLocal() as db:
+                batch = (
+                    select(FileAttachment.id)
+                    .where(FileAttachment.message_id.is_(None), FileAttachment.created_at < cutoff)
+                    .limit(settings.GC_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )
+                result = await db.execute(
+                    delete(FileAttachment)
+                    .where(FileAttachment.id.in_(batch.scalar_subquery()))
+                    .returning(
+                        FileAttachment.id,
+                        FileAttachment.stored_filename,
+                        FileAttachment.content_hash,
+                    )
+                )
+                deleted = result.all()
+                await db.commit()
+                report["rows_deleted"] += len(deleted)
+                if deleted:
+                    await attachment_cache.changed(row.id for row in deleted)
+
+                # Legacy uuid-named files belong to exactly one row; blobs may have others
+                hashes = {row.content_hash for row in deleted if row.content_hash}
+                kept = set()
+                if hashes:
+                    result = await db.execute(
+                        select(FileAttachment.content_hash)
+                        .where(FileAttachment.content_hash.in_(hashes))
+                        .distinct()
+                    )
+                    kept = set(result.scalars())
+            unreferenced = {
+                row.stored_filename
+                for row in deleted
+                if not row.content_hash or row.content_hash not in kept
+            }
+            await asyncio.to_thread(self._remove_files, unreferenced, report)
+
+            if len(deleted) < settings.GC_BATCH_SIZE:
+                break
+            await self._pause()
+        return budget
+
+    async def _collect_shard(self, report: dict[str, int], budget: int):
+        if budget <= 0:
+            return
+        if self._shard == 0:
+            # Once per cycle: legacy files at the top level and leftover temporaries
+            await asyncio.to_thread(self._remove_stale_tmp, report)
+            budget = await self._collect_legacy(report, budget)
+
+        candidates = await asyncio.to_thread(self._stale_blobs, SHARDS[self._shard])
+        for start in range(0, len(candidates), settings.GC_BATCH_SIZE):
+            if budget <= 0:
+                # Out of budget mid-shard: pick it up again next pass
+                return
+            budget -= 1
+            batch = candidates[start:start + settings.GC_BATCH_SIZE]
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(FileAttachment.content_hash)
+                    .where(FileAttachment.content_hash.in_([h for h, _ in batch]))
+                    .distinct()
+                )
+                kept = set(result.scalars())
+            await asyncio.to_thread(
+                self._remove_files, {name for h, name in batch if h not in kept}, report
+            )
+            await self._pause()
+        self._shard = (self._shard + 1) % len(SHARDS)
+
+    async def _collect_legacy(self, report: dict[str, int], budget: int) -> int:
+        names = await asyncio.to_thread(self._stale_legacy)
+        for start in range(0, len(names), settings.GC_BATCH_SIZE):
+            if budget <= 0:
+                break
+            budget -= 1
+            batch = names[start:start + settings.GC_BATCH_SIZE]
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(FileAttachment.stored_filename).where(
+                        FileAttachment.stored_filename.in_(batch)
+                    )
+                )
+                kept = set(result.scalars())
+            await asyncio.to_thread(self._remove_files, set(batch) - kept, report)
+            await self._pause()
+        return budget
+
+    def _is_stale(self, path: str) -> bool:
+        try:
+            return os.stat(path).st_mtime < time.time() - settings.GC_GRACE
+        except FileNotFoundError:
+            return False
+
+    def _stale_blobs(self, shard: str) -> list[tuple[str, str]]:
+        """(content_hash, stored_filename) of blobs in a shard untouched for GC_GRACE."""
+        root = os.path.join(settings.UPLOAD_DIR, shard)
+        found = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if self._is_stale(path):
+                    found.append((name, os.path.relpath(path, settings.UPLOAD_DIR)))
+        return found
+
+    def _stale_legacy(self) -> list[str]:
+        try:
+            entries = list(os.scandir(settings.UPLOAD_DIR))
+        except FileNotFoundError:
+            return []
+        return [e.name for e in entries if e.is_file() and self._is_stale(e.path)]
+
+    def _remove_stale_tmp(self, report: dict[str, int]):
+        root = os.path.join(settings.UPLOAD_DIR, "tmp")
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if self._is_stale(entry.path):
+                self._unlink(entry.path, report)
+
+    def _remove_files(self, stored_filenames: set[str], report: dict[str, int]):
+        for stored_filename in stored_filenames:
+            path = get_file_path(stored_filename)
+            # A blob reused since it was listed has been touched; leave it
+            if self._is_stale(path):
+                self._unlink(path, report)
+                self._unlink(get_file_path(preview_name(stored_filename)), report)
+
+    def _unlink(self, path: str, report: dict[str, int]):
+        try:
+            size = os.stat(path).st_size
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        report["files_deleted"] += 1
+        report["bytes_reclaimed"] += size
+
+
+attachment_gc = AttachmentGC()
@@ -0,0 +1,83 @@
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.security import decode_access_token
+
+
+class AuthCache:
+    """Verified token claims and loaded principals for request authentication.
+
+    A token seen recently skips the signature check, and its user is merged
+    into the request's session from a detached snapshot instead of being
+    selected again. Entries are short-lived and dropped whenever the user
+    changes (user_cache publishes that to every worker); a per-user
+    generation keeps a load that raced such a change from being cached.
+    """
+
+    def __init__(self):
+        # Keyed by the whole token, not just its signature, so a cached entry
+        # can only ever be returned for the exact token that was verified.
+        self._claims: TTLCache[str, tuple[int, dict[str, Any]]] = TTLCache(
+            settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL
+        )
+        self._principals: TTLCache[uuid.UUID, tuple[int, User]] = TTLCache(
+            settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL
+        )
+        self._generations: dict[uuid.UUID, int] = {}
+
+    def claims(self, token: str) -> dict[str, Any]:
+        """Decoded claims of a valid token; raises like decode_access_token()."""
+        entry = self._claims.get(token)
+        if entry is not None:
+            generation, claims = entry
+            if generation == self._generation(claims):
+                return claims
+        claims = decode_access_token(token)
+        # Never outlive the token itself
+        ttl = min(self._claims.ttl, claims["exp"] - time.time())
+        self._claims.set(token, (self._generation(claims), claims), ttl)
+        return claims
+
+    def user_id(self, token: str) -> uuid.UUID:
+        return uuid.UUID(self.claims(token)["sub"])
+
+    async def principal(self, db: AsyncSession, token: str) -> User | None:
+        """The token's user, attached to `db`; None if the user no longer exists."""
+        user_id = self.user_id(token)
+        generation = self._generations.get(user_id, 0)
+        entry = self._principals.get(user_id)
+        if entry is None or entry[0] != generation:
+            result = await db.execute(select(User).where(User.id == user_id))
+            user = result.scalar_one_or_none()
+            if user is None:
+                return None
+            # The cached snapshot is never handed out, only merged copies of it
+            db.expunge(user)
+            if self._generations.get(user_id, 0) == generation:
+                self._principals.set(user_id, (generation, user))
+        else:
+            user = entry[1]
+        return await db.merge(user, load=False)
+
+    def invalidate(self, user_id: uuid.UUID):
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        self._principals.pop(user_id)
+
+    def stats(self) -> dict[str, Any]:
+        return {"tokens": self._claims.stats(), "principals": self._principals.stats()}
+
+    def _generation(self, claims: dict[str, Any]) -> int:
+        try:
+            return self._generations.get(uuid.UUID(claims["sub"]), 0)
+        except (KeyError, ValueError):
+            return 0
+
+
+auth_cache = AuthCache()
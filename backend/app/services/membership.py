@@ -0,0 +1,101 @@
+import uuid
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.group_member import GroupMember
+from app.utils.cache import TTLCache
+from app.ws.manager import manager
+
+
+class MembershipIndex:
+    """In-memory user -> group_ids index for authorization checks.
+
+    A user's groups are loaded in one query (at WebSocket connect, or on the
+    first check that misses) and then kept current by the group membership
+    endpoints, which publish every change over the backplane so that all
+    workers apply it and move live sockets in or out of the room. A per-user
+    generation keeps a load that raced such a change from being cached.
+    """
+
+    def __init__(self):
+        self._groups: TTLCache[uuid.UUID, set[uuid.UUID]] = TTLCache(
+            settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL
+        )
+        self._generations: dict[uuid.UUID, int] = {}
+
+    async def load(
+        self, user_id: uuid.UUID, db: AsyncSession | None = None
+    ) -> set[uuid.UUID]:
+        """Query a user's groups and cache them.
+
+        A change applied while the query was in flight may not be in its
+        result, so a per-user generation is checked and the query repeated
+        rather than caching a set that would stay stale for the whole TTL.
+        """
+        query = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        while True:
+            generation = self._generations.get(user_id, 0)
+            if db is None:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(query)
+            else:
+                result = await db.execute(query)
+            groups = set(result.scalars())
+            if self._generations.get(user_id, 0) == generation:
+                self._groups.set(user_id, groups)
+                return groups
+
+    async def groups_of(
+        self, user_id: uuid.UUID, db: AsyncSession | None = None
+    ) -> set[uuid.UUID]:
+        groups = self._groups.get(user_id)
+        if groups is not None:
+            return groups
+        return await self.load(user_id, db)
+
+    async def is_member(
+        self, user_id: uuid.UUID, group_id: uuid.UUID, db: AsyncSession | None = None
+    ) -> bool:
+        return group_id in await self.groups_of(user_id, db)
+
+    async def added(self, group_id: uuid.UUID, user_ids: Iterable[uuid.UUID]):
+        await self._publish("add", group_id, user_ids)
+
+    async def removed(self, group_id: uuid.UUID, user_ids: Iterable[uuid.UUID]):
+        await self._publish("remove", group_id, user_ids)
+
+    def stats(self) -> dict[str, Any]:
+        return self._groups.stats()
+
+    async def _publish(self, op: str, group_id: uuid.UUID, user_ids: Iterable[uuid.UUID]):
+        await manager.publish(
+            "membership",
+            op=op,
+            group_id=str(group_id),
+            user_ids=[str(uid) for uid in user_ids],
+        )
+
+    async def _on_membership(self, envelope: dict[str, Any]):
+        group_id = uuid.UUID(envelope["group_id"])
+        joined = envelope["op"] == "add"
+        for raw_id in envelope["user_ids"]:
+            user_id = uuid.UUID(raw_id)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            # Users not loaded on this worker pick the change up on their next load
+            groups = self._groups.peek(user_id)
+            if joined:
+                if groups is not None:
+                    groups.add(group_id)
+                manager.join_user_to_room(user_id, group_id)
+            else:
+                if groups is not None:
+                    groups.discard(group_id)
+                manager.remove_user_from_room(user_id, group_id)
+
+
+membership = MembershipIndex()
+manager.on("membership", membership._on_membership)
@@ -0,0 +1,74 @@
+import uuid
+from typing import Literal
+
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.message import SEARCH_CONFIG, Message
+from app.schemas.message import SearchPage
+from app.services.message_sync import serialize_messages
+from app.utils.pagination import (
+    decode_message_cursor,
+    decode_search_cursor,
+    encode_message_cursor,
+    encode_search_cursor,
+)
+
+
+async def search_messages(
+    db: AsyncSession,
+    group_ids: set[uuid.UUID],
+    q: str,
+    sort: Literal["relevance", "recent"],
+    cursor: str | None,
+    limit: int,
+) -> SearchPage:
+    """Full-text search over message content in the given groups.
+
+    Matches come from the GIN index on search_vector; q uses web search
+    syntax ("quoted phrases", or, -excluded). Pages are keyset-paginated on
+    (rank, created_at, id) for relevance and (created_at, id) for recency.
+    Raises ValueError on a cursor that does not fit the sort.
+    """
+    if not group_ids:
+        return SearchPage(messages=[])
+
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    query_ts = func.websearch_to_tsquery(config, q)
+    # float8 so the value in the cursor compares exactly against the next query
+    rank = func.ts_rank(Message.search_vector, query_ts).cast(DOUBLE_PRECISION)
+    query = (
+        select(Message, rank)
+        .options(selectinload(Message.file_attachment))
+        .where(Message.search_vector.op("@@")(query_ts), Message.group_id.in_(group_ids))
+        .limit(limit + 1)
+    )
+    if sort == "relevance":
+        query = query.order_by(rank.desc(), Message.created_at.desc(), Message.id.desc())
+        if cursor:
+            query = query.where(
+                tuple_(rank, Message.created_at, Message.id) < tuple_(*decode_search_cursor(cursor))
+            )
+    else:
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+        if cursor:
+            query = query.where(
+                tuple_(Message.created_at, Message.id) < tuple_(*decode_message_cursor(cursor))
+            )
+
+    rows = (await db.execute(query)).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last, last_rank = page[-1]
+        if sort == "relevance":
+            next_cursor = encode_search_cursor(last_rank, last.created_at, last.id)
+        else:
+            next_cursor = encode_message_cursor(last.created_at, last.id)
+
+    return SearchPage(
+        messages=await serialize_messages(db, [message for message, _ in page]),
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,82 @@
+import uuid
+
+from sqlalchemy import BigInteger, column, select, true, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+
+from app.models.message import Message
+from app.schemas.message import GroupSync, MessageResponse
+from app.services.membership import membership
+from app.services.presence import presence
+from app.services.user_cache import user_cache
+
+
+async def serialize_messages(db: AsyncSession, messages: list[Message]) -> list[MessageResponse]:
+    """Build responses with senders from the profile cache (file_attachment must be loaded)."""
+    profiles = await user_cache.get_many(db, (m.sender_id for m in messages if m.sender_id))
+    senders = {user_id: presence.user_response(p) for user_id, p in profiles.items()}
+    return [
+        MessageResponse(
+            id=m.id,
+            group_id=m.group_id,
+            seq=m.seq,
+            sender_id=m.sender_id,
+            sender=senders.get(m.sender_id),
+            content=m.content,
+            message_type=m.message_type,
+            created_at=m.created_at,
+            file_attachment=m.file_attachment,
+        )
+        for m in messages
+    ]
+
+
+async def sync_messages(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    cursors: dict[uuid.UUID, int],
+    limit: int,
+) -> list[GroupSync]:
+    """Messages after each group's last seen seq, for all groups in one query.
+
+    Groups the user is not a member of are skipped. Each group is capped at
+    `limit` messages via a LATERAL scan of uq_messages_group_seq, so a client
+    that was away for long gets a bounded reply and sets has_more.
+    """
+    # Membership comes from the index (or the primary), not the possibly lagging db
+    groups = await membership.groups_of(user_id)
+    wanted = [(gid, max(seq, 0)) for gid, seq in cursors.items() if gid in groups]
+    if not wanted:
+        return []
+
+    cursor_rows = values(
+        column("group_id", UUID(as_uuid=True)),
+        column("last_seq", BigInteger),
+        name="cursors",
+    ).data(wanted)
+    delta = (
+        select(Message)
+        .where(Message.group_id == cursor_rows.c.group_id, Message.seq > cursor_rows.c.last_seq)
+        .order_by(Message.seq)
+        .limit(limit + 1)
+        .lateral("delta")
+    )
+    row = aliased(Message, delta)
+    result = await db.execute(
+        select(row)
+        .select_from(cursor_rows)
+        .join(delta, true())
+        .options(selectinload(row.file_attachment))
+        .order_by(row.group_id, row.seq)
+    )
+
+    # Each group may carry one row past the limit; it only signals has_more
+    by_group: dict[uuid.UUID, list[MessageResponse]] = {}
+    for message in await serialize_messages(db, result.scalars().all()):
+        by_group.setdefault(message.group_id, []).append(message)
+
+    return [
+        GroupSync(group_id=group_id, messages=messages[:limit], has_more=len(messages) > limit)
+        for group_id, messages in by_group.items()
+    ]
@@ -0,0 +1,207 @@
+import asyncio
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.group import Group
+from app.models.message import Message
+from app.models.file_attachment import FileAttachment
+from app.services.user_cache import UserProfile, user_cache
+
+
+class PendingMessage:
+    __slots__ = ("values", "file_attachment_id", "future")
+
+    def __init__(self, values: dict[str, Any], file_attachment_id: uuid.UUID | None):
+        self.values = values
+        self.file_attachment_id = file_attachment_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class MessageWriter:
+    """Write-behind persistence for chat messages.
+
+    Handlers submit a message and wait; a single writer coroutine takes
+    everything queued while the previous commit was in flight, optionally
+    waiting MESSAGE_FLUSH_INTERVAL_MS for more (up to MESSAGE_BATCH_SIZE), and
+    stores it with one multi-row INSERT and one commit. Each submitter gets
+    its broadcast payload back only after that commit succeeds.
+
+    Sequence numbers come from groups.last_seq, bumped once per group in the
+    same transaction. The row lock it takes is held until commit, so other
+    workers writing to that group queue behind it and a group's seqs become
+    visible in order, without gaps.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue[PendingMessage | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # The sentinel lets the writer flush whatever is already queued first
+        if self._task:
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+
+    async def submit(
+        self,
+        group_id: uuid.UUID,
+        sender_id: uuid.UUID,
+        content: str | None,
+        message_type: str,
+        file_attachment_id: uuid.UUID | None = None,
+    ) -> dict[str, Any]:
+        pending = PendingMessage(
+            {
+                "id": uuid.uuid4(),
+                "group_id": group_id,
+                "sender_id": sender_id,
+                "content": content,
+                "message_type": message_type,
+                "created_at": datetime.now(timezone.utc),
+            },
+            file_attachment_id,
+        )
+        self._queue.put_nowait(pending)
+        return await pending.future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        window = settings.MESSAGE_FLUSH_INTERVAL_MS / 1000
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + window
+            while len(batch) < settings.MESSAGE_BATCH_SIZE:
+                try:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        item = self._queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[PendingMessage]):
+        try:
+            results = await self._write(batch)
+        except Exception as exc:
+            if len(batch) == 1:
+                _fail(batch[0], exc)
+                return
+            # One bad row (e.g. a deleted group) must not sink the whole batch
+            for pending in batch:
+                await self._flush([pending])
+            return
+        for pending, broadcast in zip(batch, results):
+            if not pending.future.done():
+                pending.future.set_result(broadcast)
+
+    async def _write(self, batch: list[PendingMessage]) -> list[dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            await _assign_seqs(db, batch)
+            await db.execute(insert(Message).values([p.values for p in batch]))
+
+            attachments: dict[uuid.UUID, FileAttachment] = {}
+            links = {p.file_attachment_id: p.values["id"] for p in batch if p.file_attachment_id}
+            if links:
+                result = await db.execute(
+                    select(FileAttachment).where(FileAttachment.id.in_(list(links)))
+                )
+                attachments = {a.id: a for a in result.scalars()}
+                if attachments:
+                    await db.execute(
+                        update(FileAttachment),
+                        [{"id": a_id, "message_id": links[a_id]} for a_id in attachments],
+                    )
+
+            senders = await user_cache.get_many(db, (p.values["sender_id"] for p in batch))
+
+            await db.commit()
+
+        return [
+            _broadcast_payload(
+                p.values,
+                senders.get(p.values["sender_id"]),
+                attachments.get(p.file_attachment_id),
+            )
+            for p in batch
+        ]
+
+
+async def _assign_seqs(db: AsyncSession, batch: list[PendingMessage]):
+    counts = Counter(p.values["group_id"] for p in batch)
+    next_seq: dict[uuid.UUID, int] = {}
+    # Fixed lock order so two workers flushing the same groups cannot deadlock
+    for group_id in sorted(counts):
+        result = await db.execute(
+            update(Group)
+            .where(Group.id == group_id)
+            .values(last_seq=Group.last_seq + counts[group_id])
+            .returning(Group.last_seq)
+        )
+        next_seq[group_id] = result.scalar_one() - counts[group_id] + 1
+    for pending in batch:
+        group_id = pending.values["group_id"]
+        pending.values["seq"] = next_seq[group_id]
+        next_seq[group_id] += 1
+
+
+def _fail(pending: PendingMessage, exc: Exception):
+    if not pending.future.done():
+        pending.future.set_exception(exc)
+
+
+def _broadcast_payload(
+    values: dict[str, Any],
+    sender: UserProfile | None,
+    attachment: FileAttachment | None,
+) -> dict[str, Any]:
+    # UUIDs and datetimes stay native: the /ws codecs encode them directly
+    attachment_data = None
+    if attachment:
+        attachment_data = {
+            "id": attachment.id,
+            "original_filename": attachment.original_filename,
+            "file_size": attachment.file_size,
+            "mime_type": attachment.mime_type,
+            "width": attachment.width,
+            "height": attachment.height,
+            "placeholder": attachment.placeholder,
+        }
+
+    return {
+        "type": "chat_message",
+        "id": values["id"],
+        "group_id": values["group_id"],
+        "seq": values["seq"],
+        "sender_id": values["sender_id"],
+        "sender": sender.as_sender() if sender else None,
+        "content": values["content"],
+        "message_type": values["message_type"],
+        "created_at": values["created_at"],
+        "file_attachment": attachment_data,
+    }
+
+
+message_writer = MessageWriter()
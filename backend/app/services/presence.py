@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import DateTime, column, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.schemas.user import UserResponse
+from app.services.user_cache import user_cache
+from app.ws.manager import manager
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceService:
+    """Cluster-wide online state, derived from each worker's ConnectionManager.
+
+    A worker announces a user over the backplane when their first local
+    socket opens and retracts them when the last one closes. Every worker
+    folds those announcements into a user -> reporting-workers count, so
+    "who is online" is answered from memory in O(online), and user_status
+    is pushed to local sockets only when that count goes from or to zero.
+    Periodic snapshots resync the view and expire the users of a worker
+    that stopped sending them. last_seen stamps are coalesced and written
+    with one multi-row UPDATE per LAST_SEEN_FLUSH_INTERVAL.
+    """
+
+    def __init__(self):
+        self.worker = uuid.uuid4().hex
+        # worker -> (monotonic time last heard from, users it reports online)
+        self._workers: dict[str, tuple[float, set[uuid.UUID]]] = {}
+        # user -> number of workers reporting them online
+        self._online: dict[uuid.UUID, int] = {}
+        self._last_seen: dict[uuid.UUID, datetime] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._heartbeat()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+        # Other workers answer with their snapshots
+        await self._publish("query", ())
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stamp(manager.active_users)
+        await self._publish("snapshot", ())
+        await self._flush()
+
+    def is_online(self, user_id: uuid.UUID) -> bool:
+        return user_id in self._online
+
+    def online_user_ids(self) -> list[uuid.UUID]:
+        return list(self._online)
+
+    def user_response(self, user: Any) -> UserResponse:
+        """API view of a user row or cached profile, with is_online from live presence."""
+        return UserResponse(
+            id=user.id,
+            username=user.username,
+            display_name=user.display_name,
+            avatar_color=user.avatar_color,
+            is_online=self.is_online(user.id),
+            last_seen=user.last_seen,
+            created_at=user.created_at,
+        )
+
+    async def connected(self, user_id: uuid.UUID):
+        """The user's first socket on this worker opened."""
+        await self._publish("online", (user_id,))
+
+    async def disconnected(self, user_id: uuid.UUID):
+        """The user's last socket on this worker closed."""
+        self._stamp((user_id,))
+        await self._publish("offline", (user_id,))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "online": len(self._online),
+            "workers": len(self._workers),
+            "pending_last_seen": len(self._last_seen),
+        }
+
+    async def _publish(self, op: str, user_ids: Iterable[uuid.UUID]):
+        await manager.publish(
+            "presence", worker=self.worker, op=op, user_ids=[str(uid) for uid in user_ids]
+        )
+
+    async def _on_presence(self, envelope: dict[str, Any]):
+        worker, op = envelope["worker"], envelope["op"]
+        if op == "query":
+            if worker != self.worker:
+                await self._publish("snapshot", manager.active_users)
+            return
+
+        users = {uuid.UUID(raw_id) for raw_id in envelope["user_ids"]}
+        _, reported = self._workers.get(worker, (0.0, set()))
+        if op == "online":
+            current = reported | users
+        elif op == "offline":
+            current = reported - users
+        else:
+            current = users
+        if current:
+            self._workers[worker] = (time.monotonic(), current)
+        else:
+            self._workers.pop(worker, None)
+        self._apply(reported, current)
+
+    def _apply(self, before: set[uuid.UUID], after: set[uuid.UUID]):
+        for user_id in after - before:
+            self._online[user_id] = self._online.get(user_id, 0) + 1
+            if self._online[user_id] == 1:
+                manager.send_to_local(
+                    {"type": "user_status", "user_id": user_id, "is_online": True},
+                    exclude_user=user_id,
+                )
+        for user_id in before - after:
+            remaining = self._online.get(user_id, 1) - 1
+            if remaining > 0:
+                self._online[user_id] = remaining
+                continue
+            self._online.pop(user_id, None)
+            manager.send_to_local(
+                {"type": "user_status", "user_id": user_id, "is_online": False},
+            )
+
+    async def _heartbeat(self):
+        interval = settings.PRESENCE_HEARTBEAT_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._publish("snapshot", manager.active_users)
+                self._expire(time.monotonic() - 3 * interval)
+            except Exception:
+                logger.exception("Presence heartbeat failed")
+
+    def _expire(self, cutoff: float):
+        # Workers that crashed never retract their users; drop them here
+        for worker, (heard, reported) in list(self._workers.items()):
+            if worker != self.worker and heard < cutoff:
+                del self._workers[worker]
+                self._apply(reported, set())
+                self._stamp(uid for uid in reported if not self.is_online(uid))
+
+    def _stamp(self, user_ids: Iterable[uuid.UUID]):
+        now = datetime.now(timezone.utc)
+        for user_id in user_ids:
+            self._last_seen[user_id] = now
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.LAST_SEEN_FLUSH_INTERVAL)
+            await self._flush()
+
+    async def _flush(self):
+        if not self._last_seen:
+            return
+        pending, self._last_seen = self._last_seen, {}
+        seen = values(
+            column("id", UUID(as_uuid=True)),
+            column("last_seen", DateTime(timezone=True)),
+            name="seen",
+        ).data(list(pending.items()))
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(User)
+                    .where(User.id == seen.c.id)
+                    .values(last_seen=seen.c.last_seen)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to persist last_seen, retrying next flush")
+            for user_id, stamp in pending.items():
+                self._last_seen.setdefault(user_id, stamp)
+            return
+        await user_cache.seen(pending)
+
+
+presence = PresenceService()
+manager.on("presence", presence._on_presence)
+manager.on_user_offline(presence.disconnected)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import aiofiles
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.upload_session import UploadSession
+from app.utils.file_utils import copy_hashed, store_blob
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkMismatch(ValueError):
+    pass
+
+
+class UploadClosed(LookupError):
+    """The upload was completed, aborted or swept while a chunk was on its way."""
+
+
+class ResumableUploads:
+    """Chunked uploads that survive dropped connections.
+
+    A session preallocates UPLOAD_DIR/partial/<id>/data. Each chunk is
+    written at its offset and then marked done with an empty file named
+    after its index, so chunks may arrive in any order, in parallel and on
+    any worker sharing the volume; a chunk cut off mid-way is simply sent
+    again. Completing first seals the data file (renames it, so no chunk can
+    open it any more), then copies it aside while hashing and moves the copy
+    into the content-addressed store: a chunk that opened the file before the
+    seal may still be writing to it, but not to the copy.
+    Sessions left idle past UPLOAD_SESSION_TTL are swept with their bytes.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def directory(self, upload_id: uuid.UUID) -> str:
+        return os.path.join(settings.UPLOAD_DIR, "partial", str(upload_id))
+
+    def chunk_count(self, session: UploadSession) -> int:
+        return -(-session.file_size // session.chunk_size)
+
+    def chunk_length(self, session: UploadSession, index: int) -> int:
+        return min(session.chunk_size, session.file_size - index * session.chunk_size)
+
+    def create(self, session: UploadSession):
+        directory = self.directory(session.id)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "data"), "wb") as f:
+            # Sparse: disk is only used as chunks land
+            f.truncate(session.file_size)
+
+    def received(self, session: UploadSession) -> list[int]:
+        try:
+            names = os.listdir(self.directory(session.id))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def received_bytes(self, session: UploadSession, received: list[int]) -> int:
+        return sum(self.chunk_length(session, index) for index in received)
+
+    async def write_chunk(
+        self, session: UploadSession, index: int, body: AsyncIterator[bytes]
+    ):
+        """Write one chunk from a request body, then mark it received.
+
+        Raises ChunkMismatch if the body is not exactly the chunk's length,
+        UploadClosed if the upload is no longer accepting chunks.
+        """
+        expected = self.chunk_length(session, index)
+        directory = self.directory(session.id)
+        written = 0
+        try:
+            async with aiofiles.open(os.path.join(directory, "data"), "r+b") as f:
+                await f.seek(index * session.chunk_size)
+                async for piece in body:
+                    written += len(piece)
+                    if written > expected:
+                        raise ChunkMismatch(f"Chunk {index} must be {expected} bytes")
+                    await f.write(piece)
+            if written != expected:
+                raise ChunkMismatch(f"Chunk {index} must be {expected} bytes, got {written}")
+            open(os.path.join(directory, str(index)), "wb").close()
+        except FileNotFoundError:
+            raise UploadClosed() from None
+
+    def seal(self, session: UploadSession) -> bool:
+        """Stop accepting chunks; False if the upload is already sealed or gone."""
+        directory = self.directory(session.id)
+        try:
+            os.rename(os.path.join(directory, "data"), os.path.join(directory, "sealed"))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def unseal(self, session: UploadSession):
+        """Accept chunks again after a failed finish, so completing can be retried."""
+        directory = self.directory(session.id)
+        try:
+            os.remove(os.path.join(directory, "copy"))
+        except FileNotFoundError:
+            pass
+        try:
+            os.rename(os.path.join(directory, "sealed"), os.path.join(directory, "data"))
+        except FileNotFoundError:
+            pass
+
+    async def finish(self, session: UploadSession) -> tuple[str, str]:
+        """Move a sealed upload into blob storage; returns (stored_filename, content_hash).
+
+        Raises FileNotFoundError if it was aborted or swept in the meantime.
+        On any error the upload is unsealed again before the error propagates.
+        """
+        directory = self.directory(session.id)
+        copy_path = os.path.join(directory, "copy")
+        try:
+            content_hash = await asyncio.to_thread(
+                copy_hashed, os.path.join(directory, "sealed"), copy_path
+            )
+            stored_filename = store_blob(copy_path, content_hash)
+        except BaseException:
+            self.unseal(session)
+            raise
+        self.discard(session.id)
+        return stored_filename, content_hash
+
+    def discard(self, upload_id: uuid.UUID):
+        shutil.rmtree(self.directory(upload_id), ignore_errors=True)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.UPLOAD_CLEANUP_INTERVAL)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Failed to sweep expired uploads")
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(UploadSession)
+                .where(UploadSession.expires_at < datetime.now(timezone.utc))
+                .returning(UploadSession.id)
+            )
+            expired = list(result.scalars())
+            await db.commit()
+            # Directories whose row never committed or went with its user
+            stale = await asyncio.to_thread(self._stale_directories)
+            if stale:
+                result = await db.execute(
+                    select(UploadSession.id).where(UploadSession.id.in_(stale))
+                )
+                expired += set(stale) - set(result.scalars())
+        for upload_id in expired:
+            await asyncio.to_thread(self.discard, upload_id)
+        if expired:
+            logger.info("Removed %d expired uploads", len(expired))
+        return len(expired)
+
+    def _stale_directories(self) -> list[uuid.UUID]:
+        root = os.path.join(settings.UPLOAD_DIR, "partial")
+        cutoff = datetime.now(timezone.utc).timestamp() - settings.UPLOAD_SESSION_TTL
+        stale = []
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            return stale
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    stale.append(uuid.UUID(entry.name))
+            except (OSError, ValueError):
+                continue
+        return stale
+
+
+resumable_uploads = ResumableUploads()
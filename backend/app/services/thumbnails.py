@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.attachment_cache import attachment_cache
+from app.models.file_attachment import FileAttachment
+from app.utils.file_utils import get_file_path, preview_name
+from app.utils.images import render_preview
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailService:
+    """Renders previews of image attachments in a process pool after upload.
+
+    Each image gets a JPEG of at most THUMBNAIL_MAX_SIDE px under
+    UPLOAD_DIR/thumbs, and its row gets the original's dimensions and a
+    blurred placeholder. Rows sharing a blob copy an existing preview
+    instead of rendering it again. Workers caching the row are told to drop it.
+    """
+
+    def __init__(self):
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def start(self):
+        # spawn: forking a process that already runs threads is unsafe
+        self._pool = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    async def stop(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def process(self, attachment: FileAttachment):
+        """Background task for a freshly committed attachment; no-op unless it is an image."""
+        if self._pool is None or not attachment.mime_type.startswith("image/"):
+            return
+        try:
+            values = await self._existing(attachment) or await self._render(attachment)
+        except Exception:
+            logger.warning("No preview for attachment %s", attachment.id, exc_info=True)
+            return
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(FileAttachment).where(FileAttachment.id == attachment.id).values(**values)
+            )
+            await db.commit()
+        await attachment_cache.changed((attachment.id,))
+
+    async def _existing(self, attachment: FileAttachment) -> dict | None:
+        if not attachment.content_hash:
+            return None
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    FileAttachment.width,
+                    FileAttachment.height,
+                    FileAttachment.thumbnail_filename,
+                    FileAttachment.placeholder,
+                )
+                .where(
+                    FileAttachment.content_hash == attachment.content_hash,
+                    FileAttachment.thumbnail_filename.is_not(None),
+                )
+                .limit(1)
+            )
+            row = result.first()
+        return dict(row._mapping) if row else None
+
+    async def _render(self, attachment: FileAttachment) -> dict:
+        thumbnail_filename = preview_name(attachment.stored_filename)
+        width, height, placeholder = await asyncio.get_running_loop().run_in_executor(
+            self._pool,
+            render_preview,
+            get_file_path(attachment.stored_filename),
+            get_file_path(thumbnail_filename),
+            settings.THUMBNAIL_MAX_SIDE,
+            settings.THUMBNAIL_QUALITY,
+        )
+        return {
+            "width": width,
+            "height": height,
+            "thumbnail_filename": thumbnail_filename,
+            "placeholder": placeholder,
+        }
+
+
+thumbnails = ThumbnailService()
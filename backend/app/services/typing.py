@@ -0,0 +1,98 @@
+import asyncio
+import time
+import uuid
+from typing import Any
+
+from app.config import settings
+from app.ws.manager import manager
+
+
+class TypingAggregator:
+    """Per-room "who is typing" state with coalesced fan-out.
+
+    Clients send a typing frame on every keystroke. Only state changes, and
+    a refresh every TYPING_TTL / 2 while someone keeps typing, cross the
+    backplane; repeats in between are dropped at the source. Each worker
+    keeps the typing set of every room with expiry and, at most once per
+    TYPING_FLUSH_INTERVAL_MS, sends each changed room one frame listing
+    everyone currently typing to its local sockets.
+    """
+
+    def __init__(self):
+        # group_id -> user_id -> monotonic expiry
+        self._rooms: dict[uuid.UUID, dict[uuid.UUID, float]] = {}
+        self._dirty: set[uuid.UUID] = set()
+        # (user_id, group_id) -> when this worker last published "typing" for it
+        self._published: dict[tuple[uuid.UUID, uuid.UUID], float] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def update(self, group_id: uuid.UUID, user_id: uuid.UUID, is_typing: bool):
+        """Record a typing frame from a local client; publishes only if it matters."""
+        key = (user_id, group_id)
+        now = time.monotonic()
+        if is_typing:
+            last = self._published.get(key)
+            if last is not None and now - last < settings.TYPING_TTL / 2:
+                return
+            self._published[key] = now
+        elif self._published.pop(key, None) is None:
+            return
+        await manager.publish(
+            "typing", group_id=str(group_id), user_id=str(user_id), is_typing=is_typing
+        )
+
+    def typing_in(self, group_id: uuid.UUID) -> list[uuid.UUID]:
+        return list(self._rooms.get(group_id, ()))
+
+    async def _on_typing(self, envelope: dict[str, Any]):
+        group_id = uuid.UUID(envelope["group_id"])
+        user_id = uuid.UUID(envelope["user_id"])
+        room = self._rooms.setdefault(group_id, {})
+        if envelope["is_typing"]:
+            if user_id not in room:
+                self._dirty.add(group_id)
+            room[user_id] = time.monotonic() + settings.TYPING_TTL
+        elif room.pop(user_id, None) is not None:
+            self._dirty.add(group_id)
+        if not room:
+            del self._rooms[group_id]
+
+    async def _run(self):
+        interval = settings.TYPING_FLUSH_INTERVAL_MS / 1000
+        while True:
+            await asyncio.sleep(interval)
+            self._expire(time.monotonic())
+            dirty, self._dirty = self._dirty, set()
+            for group_id in dirty:
+                manager.send_to_local_room(
+                    group_id,
+                    {
+                        "type": "typing",
+                        "group_id": group_id,
+                        "user_ids": self.typing_in(group_id),
+                    },
+                )
+
+    def _expire(self, now: float):
+        for group_id, room in list(self._rooms.items()):
+            expired = [uid for uid, expires in room.items() if expires <= now]
+            for user_id in expired:
+                del room[user_id]
+                self._published.pop((user_id, group_id), None)
+            if expired:
+                self._dirty.add(group_id)
+            if not room:
+                del self._rooms[group_id]
+
+
+typing_aggregator = TypingAggregator()
+manager.on("typing", typing_aggregator._on_typing)
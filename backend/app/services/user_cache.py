@@ -0,0 +1,123 @@
+import uuid
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.user import User
+from app.services.auth_cache import auth_cache
+from app.utils.cache import TTLCache
+from app.ws.manager import manager
+
+
+@dataclass(frozen=True, slots=True)
+class UserProfile:
+    """The public part of a user row, detached from any session.
+
+    Online state is not part of it: that lives in presence, which fills it
+    in when a profile is turned into a response.
+    """
+
+    id: uuid.UUID
+    username: str
+    display_name: str
+    avatar_color: str
+    last_seen: datetime | None
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserProfile":
+        return cls(
+            id=user.id,
+            username=user.username,
+            display_name=user.display_name,
+            avatar_color=user.avatar_color,
+            last_seen=user.last_seen,
+            created_at=user.created_at,
+        )
+
+    def as_sender(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "display_name": self.display_name,
+            "avatar_color": self.avatar_color,
+        }
+
+
+class UserCache:
+    """Process-local cache of user profiles for message sender enrichment.
+
+    Filled on login, register and WebSocket connect; entries for a user are
+    replaced locally and dropped on every other worker whenever that user's
+    row changes. The same change notice evicts the user from auth_cache;
+    flushed last_seen stamps use a lighter notice that leaves it alone.
+    """
+
+    def __init__(self):
+        self._cache: TTLCache[uuid.UUID, UserProfile] = TTLCache(
+            settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL
+        )
+
+    def put(self, user: User) -> UserProfile:
+        profile = UserProfile.from_user(user)
+        self._cache.set(user.id, profile)
+        return profile
+
+    def invalidate(self, user_id: uuid.UUID):
+        self._cache.pop(user_id)
+
+    async def changed(self, user: User):
+        """Record an updated user row here and evict it from the other workers."""
+        # Publishing also evicts locally, so refill only afterwards
+        await manager.publish("user_changed", user_id=str(user.id))
+        self.put(user)
+
+    async def seen(self, last_seen: dict[uuid.UUID, datetime]):
+        """Record persisted last_seen stamps here and evict those users elsewhere."""
+        cached = {
+            user_id: profile
+            for user_id in last_seen
+            if (profile := self._cache.get(user_id)) is not None
+        }
+        # Publishing also evicts locally, so refill only afterwards
+        await manager.publish("users_seen", user_ids=[str(user_id) for user_id in last_seen])
+        for user_id, profile in cached.items():
+            self._cache.set(user_id, replace(profile, last_seen=last_seen[user_id]))
+
+    async def get_many(
+        self, db: AsyncSession, user_ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, UserProfile]:
+        profiles: dict[uuid.UUID, UserProfile] = {}
+        missing = []
+        for user_id in set(user_ids):
+            profile = self._cache.get(user_id)
+            if profile is None:
+                missing.append(user_id)
+            else:
+                profiles[user_id] = profile
+        if missing:
+            result = await db.execute(select(User).where(User.id.in_(missing)))
+            for user in result.scalars():
+                profiles[user.id] = self.put(user)
+        return profiles
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+    async def _on_user_changed(self, envelope: dict[str, Any]):
+        user_id = uuid.UUID(envelope["user_id"])
+        self.invalidate(user_id)
+        auth_cache.invalidate(user_id)
+
+    async def _on_users_seen(self, envelope: dict[str, Any]):
+        for raw_id in envelope["user_ids"]:
+            self.invalidate(uuid.UUID(raw_id))
+
+
+user_cache = UserCache()
+manager.on("user_changed", user_cache._on_user_changed)
+manager.on("users_seen", user_cache._on_users_seen)
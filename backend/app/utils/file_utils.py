@@ -1,32 +1,121 @@
+import asyncio
+import hashlib
 import os
 import uuid
-import aiofiles
+from typing import Any, AsyncIterator, BinaryIO
+
 from fastapi import UploadFile
 
 from app.config import settings
 
+CHUNK_SIZE = 1024 * 1024  # 1MB
 
-async def save_upload_file(file: UploadFile) -> tuple[str, int, str]:
-    """Save uploaded file and return (stored_filename, file_size, mime_type)."""
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
-    ext = os.path.splitext(file.filename or "")[1]
-    stored_filename = f"{uuid.uuid4()}{ext}"
-    file_path = os.path.join(settings.UPLOAD_DIR, stored_filename)
+def blob_name(content_hash: str) -> str:
+    """Stored filename of a content-addressed blob, sharded two levels deep."""
+    return os.path.join(content_hash[:2], content_hash[2:4], content_hash)
 
-    file_size = 0
-    async with aiofiles.open(file_path, "wb") as f:
-        while chunk := await file.read(1024 * 1024):  # 1MB chunks
-            file_size += len(chunk)
-            if file_size > settings.MAX_FILE_SIZE:
-                os.remove(file_path)
-                raise ValueError(
-                    f"File too large. Max size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
-                )
-            await f.write(chunk)
 
+def preview_name(stored_filename: str) -> str:
+    """Stored filename of an image's preview; rows sharing a blob share it."""
+    return os.path.join("thumbs", stored_filename + ".jpg")
+
+
+async def save_upload_file(file: UploadFile) -> tuple[str, int, str, str]:
+    """Save uploaded file and return (stored_filename, file_size, mime_type, content_hash)."""
+
+    async def chunks() -> AsyncIterator[bytes]:
+        while chunk := await file.read(CHUNK_SIZE):
+            yield chunk
+
+    stored_filename, file_size, content_hash = await save_stream(chunks())
     mime_type = file.content_type or "application/octet-stream"
-    return stored_filename, file_size, mime_type
+    return stored_filename, file_size, mime_type, content_hash
+
+
+async def save_stream(chunks: AsyncIterator[bytes]) -> tuple[str, int, str]:
+    """Store a byte stream and return (stored_filename, file_size, content_hash).
+
+    Bytes are hashed and written in one pass, gathered into CHUNK_SIZE writes,
+    to a temporary file inside UPLOAD_DIR that is then renamed to its content
+    address; if that blob already exists the copy is discarded. Raises
+    ValueError as soon as the stream passes MAX_FILE_SIZE.
+    """
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    file_size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            async for chunk in chunks:
+                file_size += len(chunk)
+                if file_size > settings.MAX_FILE_SIZE:
+                    raise ValueError(
+                        f"File too large. Max size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
+                    )
+                buffer += chunk
+                if len(buffer) >= CHUNK_SIZE:
+                    await asyncio.to_thread(_write_hashed, f, hasher, buffer)
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(_write_hashed, f, hasher, buffer)
+
+        content_hash = hasher.hexdigest()
+        stored_filename = store_blob(tmp_path, content_hash)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return stored_filename, file_size, content_hash
+
+
+def _write_hashed(f: BinaryIO, hasher: Any, data: bytearray):
+    # hashlib and file writes both drop the GIL, so this runs beside the loop
+    hasher.update(data)
+    f.write(data)
+
+
+def store_blob(path: str, content_hash: str) -> str:
+    """Move a fully written file to its content address; return the stored filename.
+
+    ``path`` must be on the same filesystem as UPLOAD_DIR. If the blob is
+    already stored, ``path`` is removed instead.
+    """
+    stored_filename = blob_name(content_hash)
+    if touch_blob(stored_filename):
+        os.remove(path)
+    else:
+        file_path = get_file_path(stored_filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(path, file_path)
+    return stored_filename
+
+
+def touch_blob(stored_filename: str) -> bool:
+    """Mark a stored blob as just reused; False if it does not exist.
+
+    The garbage collector only removes blobs untouched for GC_GRACE, so a
+    row about to reference a blob is committed before it can be collected.
+    """
+    try:
+        os.utime(get_file_path(stored_filename))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def copy_hashed(src: str, dst: str) -> str:
+    """Copy a file on disk and return the SHA-256 of the copy; blocking, run it in a thread."""
+    hasher = hashlib.sha256()
+    with open(src, "rb") as f, open(dst, "wb") as out:
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            out.write(chunk)
+    return hasher.hexdigest()
 
 
 def get_file_path(stored_filename: str) -> str:
@@ -0,0 +1,219 @@
+import re
+import secrets
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 256 * 1024
+# More ranges than this (after merging) is treated as no Range at all
+MAX_RANGES = 16
+# Stored files never change, so caches may keep them for good
+IMMUTABLE = "private, max-age=31536000, immutable"
+# For a response that may be replaced at the same URL; caches must revalidate
+REVALIDATE = "private, no-cache"
+
+_DIGITS = re.compile(r"[0-9]+")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str | None, size: int) -> list[tuple[int, int]] | None:
+    """Byte ranges asked for by a Range header, as sorted, merged [start, end).
+
+    None means "send the whole file": no header, a unit other than bytes, a
+    malformed value (RFC 9110 says to ignore those) or too many ranges.
+    Raises RangeNotSatisfiable when the header is valid but no range
+    overlaps the file.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+
+    ranges: list[tuple[int, int]] = []
+    seen = False
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        seen = True
+        first, dash, last = (p.strip() for p in part.partition("-"))
+        if not dash:
+            return None
+        if not first:
+            # Suffix range: the last N bytes
+            if not _DIGITS.fullmatch(last):
+                return None
+            length = int(last)
+            if length and size:
+                ranges.append((max(size - length, 0), size))
+            continue
+        if not _DIGITS.fullmatch(first) or (last and not _DIGITS.fullmatch(last)):
+            return None
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            end = int(last) + 1 if last else size
+            ranges.append((start, min(end, size)))
+    if not seen:
+        return None
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(microsecond=0), usegmt=True)
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Whether a conditional GET can be answered with 304."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def file_response(
+    request: Request,
+    path: str,
+    size: int,
+    media_type: str,
+    etag: str,
+    last_modified: datetime,
+    filename: str,
+    cache_control: str = IMMUTABLE,
+) -> Response:
+    """Serve a stored file with validators, 304s and single/multi-range support."""
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = content_disposition(filename)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range takes a strong validator: our ETag, or the exact Last-Modified
+    if if_range is not None and if_range.strip() not in (etag, headers["Last-Modified"]):
+        range_header = None
+    try:
+        ranges = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+        )
+
+    if ranges is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_read(path, 0, size), media_type=media_type, headers=headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        headers["Content-Length"] = str(end - start)
+        return StreamingResponse(
+            _read(path, start, end), status_code=206, media_type=media_type, headers=headers
+        )
+
+    boundary = secrets.token_hex(16)
+    parts = [
+        (
+            (
+                f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+            ).encode(),
+            start,
+            end,
+        )
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode()
+    length = sum(len(head) + (end - start) + 2 for head, start, end in parts) + len(closing)
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _read_parts(path, parts, closing),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
+
+
+def accel_redirect_response(
+    uri: str, media_type: str, filename: str, cache_control: str = IMMUTABLE
+) -> Response:
+    """Hand the transfer to nginx; it serves ``uri`` from an internal location.
+
+    nginx answers ranges and conditionals itself (with its own ETag) and keeps
+    the Content-Type, Content-Disposition and Cache-Control set here.
+    """
+    return Response(
+        headers={
+            "X-Accel-Redirect": quote(uri),
+            "Content-Type": media_type,
+            "Content-Disposition": content_disposition(filename),
+            "Cache-Control": cache_control,
+        }
+    )
+
+
+async def _read(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _read_parts(
+    path: str, parts: list[tuple[bytes, int, int]], closing: bytes
+) -> AsyncIterator[bytes]:
+    for head, start, end in parts:
+        yield head
+        async for chunk in _read(path, start, end):
+            yield chunk
+        yield b"\r\n"
+    yield closing
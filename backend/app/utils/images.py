@@ -0,0 +1,36 @@
+import base64
+import io
+import os
+
+from PIL import Image, ImageOps
+
+# EXIF orientations that turn the picture on its side
+_ROTATED = {5, 6, 7, 8}
+
+
+def render_preview(src: str, dest: str, max_side: int, quality: int) -> tuple[int, int, str]:
+    """Write a JPEG preview of an image; return (width, height, placeholder).
+
+    Runs in a worker process. width and height are the upright size of the
+    original; placeholder is a data URL of a tiny blurred version for the UI
+    to show while the preview loads.
+    """
+    with Image.open(src) as im:
+        width, height = im.size
+        if im.getexif().get(0x0112, 1) in _ROTATED:
+            width, height = height, width
+        # thumbnail() lets JPEG decode at a reduced scale instead of full size
+        im.thumbnail((max_side, max_side))
+        preview = ImageOps.exif_transpose(im).convert("RGB")
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    preview.save(tmp, "JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(tmp, dest)
+
+    tiny = preview.copy()
+    tiny.thumbnail((16, 16))
+    buffer = io.BytesIO()
+    tiny.save(buffer, "JPEG", quality=40)
+    placeholder = "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+    return width, height, placeholder
@@ -0,0 +1,43 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(*parts: object) -> str:
+    """Opaque, URL-safe cursor from the sort key of a row."""
+    raw = "|".join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("Malformed cursor")
+
+
+def encode_message_cursor(created_at: datetime, message_id: uuid.UUID) -> str:
+    return encode_cursor(created_at.isoformat(), message_id)
+
+
+def decode_message_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverse of encode_message_cursor; raises ValueError on anything else."""
+    parts = decode_cursor(cursor)
+    if len(parts) != 2:
+        raise ValueError("Malformed cursor")
+    return datetime.fromisoformat(parts[0]), uuid.UUID(parts[1])
+
+
+def encode_search_cursor(rank: float, created_at: datetime, message_id: uuid.UUID) -> str:
+    # repr round-trips the float exactly, which keyset comparison needs
+    return encode_cursor(repr(rank), created_at.isoformat(), message_id)
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, datetime, uuid.UUID]:
+    """Inverse of encode_search_cursor; raises ValueError on anything else."""
+    parts = decode_cursor(cursor)
+    if len(parts) != 3:
+        raise ValueError("Malformed cursor")
+    return float(parts[0]), datetime.fromisoformat(parts[1]), uuid.UUID(parts[2])
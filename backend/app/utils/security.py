@@ -1,4 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, TypeVar
 from uuid import UUID
 
 from jose import jwt, JWTError
@@ -8,13 +11,51 @@ from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
 
+class PasswordPoolBusy(Exception):
+    """Every worker is hashing and the wait queue is full; retry later."""
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+
+class PasswordPool:
+    """Bounded thread pool for bcrypt.
+
+    bcrypt releases the GIL, so a few threads keep a login storm from
+    freezing the event loop (and every WebSocket with it). Work past
+    `workers + max_queue` in flight is refused at once rather than queued
+    behind seconds of hashing.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.limit = workers + max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {"in_flight": self.in_flight, "limit": self.limit, "rejected": self.rejected}
+
+
+password_pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_MAX)
+
+
+async def hash_password(password: str) -> str:
+    return await password_pool.run(pwd_context.hash, password)
+
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await password_pool.run(pwd_context.verify, plain, hashed)
 
 
 def create_access_token(user_id: UUID, username: str) -> str:
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.database import engine
+from app.models.event_payload import EventPayload
+from app.ws.codec import decode_json, encode_json
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+LISTENER_ERRORS = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError)
+
+
+class Backplane:
+    """Single-process backplane: every published event is delivered locally."""
+
+    def __init__(self):
+        self.handler: Handler | None = None
+
+    async def start(self, handler: Handler):
+        self.handler = handler
+
+    async def stop(self):
+        pass
+
+    async def publish(self, envelope: dict[str, Any]):
+        await self.handler(envelope)
+
+
+class PostgresBackplane(Backplane):
+    """Fans events out to every worker and host through Postgres LISTEN/NOTIFY.
+
+    NOTIFY goes over the backplane's own LISTEN connection, one at a time,
+    so broadcasts never take connections from the request pool. While that
+    connection is being re-established, events only reach local sockets.
+    """
+
+    CHANNEL = "lanchat_ws"
+    # NOTIFY payloads are capped at 8000 bytes; bigger events are stored and
+    # sent by reference instead.
+    MAX_NOTIFY_BYTES = 7900
+    PAYLOAD_RETENTION = timedelta(minutes=5)
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self):
+        super().__init__()
+        self.origin = uuid.uuid4().hex
+        self._inbox: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._conn: asyncpg.Connection | None = None
+        self._connected = asyncio.Event()
+        # asyncpg runs one query at a time per connection
+        self._send_lock = asyncio.Lock()
+
+    async def start(self, handler: Handler):
+        await super().start(handler)
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._consume()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def publish(self, envelope: dict[str, Any]):
+        # Local sockets get the event straight away; NOTIFY is only for the
+        # other workers, which skip notifications carrying our own origin.
+        await self.handler(envelope)
+
+        # While the listener reconnects, drop rather than queue up behind it
+        if not self._connected.is_set():
+            logger.warning(
+                "Backplane reconnecting; %s event not sent to other workers", envelope.get("kind")
+            )
+            return
+
+        data = encode_json({"o": self.origin, "e": envelope})
+        try:
+            if len(data.encode()) > self.MAX_NOTIFY_BYTES:
+                data = encode_json({"o": self.origin, "ref": await self._store(data)})
+            async with self._send_lock:
+                conn = self._conn
+                if conn is None:
+                    raise ConnectionError("Backplane connection lost")
+                await conn.execute("SELECT pg_notify($1, $2)", self.CHANNEL, data)
+        except Exception:
+            logger.exception("Failed to publish event to other workers")
+
+    @classmethod
+    async def _store(cls, data: str) -> int:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                insert(EventPayload).values(payload=data).returning(EventPayload.id)
+            )
+            await conn.execute(
+                delete(EventPayload).where(
+                    EventPayload.created_at < datetime.now(timezone.utc) - cls.PAYLOAD_RETENTION
+                )
+            )
+            return result.scalar_one()
+
+    async def _listen(self):
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        dsn = dsn.render_as_string(hide_password=False)
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn)
+            except LISTENER_ERRORS:
+                logger.warning("Backplane listener cannot connect, retrying")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                continue
+
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            try:
+                await conn.add_listener(self.CHANNEL, self._on_notify)
+                self._conn = conn
+                self._connected.set()
+                await lost.wait()
+            except LISTENER_ERRORS:
+                pass
+            finally:
+                self._connected.clear()
+                self._conn = None
+                await conn.close()
+            logger.warning("Backplane listener connection lost, reconnecting")
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str):
+        # Queue rather than handle inline so events are processed in order,
+        # even when one has to be fetched by reference.
+        self._inbox.put_nowait(payload)
+
+    async def _consume(self):
+        while True:
+            payload = await self._inbox.get()
+            try:
+                message = decode_json(payload)
+                if message["o"] == self.origin:
+                    continue
+                if "ref" in message:
+                    message = await self._load(message["ref"])
+                    if message is None:
+                        continue
+                await self.handler(message["e"])
+            except Exception:
+                logger.exception("Dropping undeliverable backplane event")
+
+    @staticmethod
+    async def _load(ref: int) -> dict[str, Any] | None:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(EventPayload.payload).where(EventPayload.id == ref)
+            )
+            payload = result.scalar_one_or_none()
+        return decode_json(payload) if payload is not None else None
+
+
+def create_backplane() -> Backplane:
+    if settings.WS_BACKPLANE == "postgres":
+        return PostgresBackplane()
+    return Backplane()
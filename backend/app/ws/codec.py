@@ -0,0 +1,85 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, without it /ws only speaks JSON
+    msgpack = None
+
+# Subprotocols a /ws client may request; its order of preference wins
+MSGPACK_PROTOCOL = "lanchat.msgpack"
+JSON_PROTOCOL = "lanchat.json"
+
+# MessagePack extension type for a UUID as its 16 raw bytes
+EXT_UUID = 1
+
+
+def encode_json(message: dict[str, Any]) -> str:
+    # Events may carry UUIDs and datetimes as is; both become strings here
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"), default=_json_default)
+
+
+def decode_json(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def negotiate_protocol(requested: list[str]) -> str | None:
+    """Pick the subprotocol to accept: the client's first choice that we speak."""
+    for protocol in requested:
+        if protocol == JSON_PROTOCOL or (protocol == MSGPACK_PROTOCOL and msgpack is not None):
+            return protocol
+    return None
+
+
+def encode_msgpack(message: dict[str, Any]) -> bytes:
+    # UUIDs and datetimes still native in the event (not ones that came over
+    # the backplane as strings) are packed as 16 bytes and a Timestamp.
+    return msgpack.packb(message, default=_msgpack_default, datetime=True)
+
+
+def decode_msgpack(data: bytes) -> Any:
+    # UUIDs come back as strings, so handlers see the same shapes as with JSON
+    return msgpack.unpackb(data, ext_hook=_ext_hook, timestamp=3)
+
+
+def pack_msgpack_array(items: list[bytes]) -> bytes:
+    """A msgpack array of already-packed items, without unpacking them."""
+    count = len(items)
+    if count < 16:
+        header = bytes((0x90 | count,))
+    elif count < 1 << 16:
+        header = b"\xdc" + count.to_bytes(2, "big")
+    else:
+        header = b"\xdd" + count.to_bytes(4, "big")
+    return header + b"".join(items)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, value.bytes)
+    raise TypeError(f"{type(value).__name__} is not MessagePack serializable")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_UUID:
+        return str(uuid.UUID(bytes=data))
+    return msgpack.ExtType(code, data)
@@ -0,0 +1,109 @@
+import time
+from typing import Any
+
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+from websockets.frames import Frame, Opcode
+
+from app.config import settings
+
+
+class DeflateStats:
+    """Raw vs on-the-wire bytes of one socket's outgoing messages."""
+
+    __slots__ = ("raw_bytes", "wire_bytes", "compressed", "skipped", "compress_seconds")
+
+    def __init__(self):
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.compressed = 0
+        self.skipped = 0
+        self.compress_seconds = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "raw_bytes": self.raw_bytes,
+            "wire_bytes": self.wire_bytes,
+            "ratio": round(self.wire_bytes / self.raw_bytes, 4) if self.raw_bytes else None,
+            "compressed": self.compressed,
+            "skipped": self.skipped,
+            "compress_ms": round(self.compress_seconds * 1000, 3),
+        }
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """permessage-deflate that sends messages under `min_size` uncompressed.
+
+    RFC 7692 lets every message choose: one without RSV1 is plain, and
+    leaves the compression context untouched. Tiny events such as typing
+    or presence cost more CPU to deflate than they save.
+    """
+
+    def __init__(self, *args: Any, min_size: int, stats: DeflateStats, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self.stats = stats
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode not in (Opcode.TEXT, Opcode.BINARY) or not frame.fin:
+            # Control frames pass through; fragmented messages always compress
+            return super().encode(frame)
+        size = len(frame.data)
+        self.stats.raw_bytes += size
+        if size < self.min_size:
+            self.stats.skipped += 1
+            self.stats.wire_bytes += size
+            return frame
+        started = time.perf_counter()
+        encoded = super().encode(frame)
+        self.stats.compress_seconds += time.perf_counter() - started
+        self.stats.compressed += 1
+        self.stats.wire_bytes += len(encoded.data)
+        return encoded
+
+
+class ThresholdDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, min_size: int, stats: DeflateStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+        self.stats = stats
+
+    def process_request_params(self, params, accepted_extensions):
+        response, ext = super().process_request_params(params, accepted_extensions)
+        return response, ThresholdPerMessageDeflate(
+            ext.remote_no_context_takeover,
+            ext.local_no_context_takeover,
+            ext.remote_max_window_bits,
+            ext.local_max_window_bits,
+            ext.compress_settings,
+            min_size=self.min_size,
+            stats=self.stats,
+        )
+
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    """uvicorn's websockets protocol with compression configured from Settings.
+
+    Each connection's DeflateStats is exposed to the app as
+    websocket.state.ws_deflate (via the ASGI scope "state").
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.deflate_stats = DeflateStats()
+        self.app_state = {**self.app_state, "ws_deflate": self.deflate_stats}
+        self.available_extensions = []
+        if settings.WS_COMPRESSION:
+            self.available_extensions.append(
+                ThresholdDeflateFactory(
+                    settings.WS_COMPRESSION_MIN_SIZE,
+                    self.deflate_stats,
+                    server_no_context_takeover=settings.WS_COMPRESSION_SERVER_NO_CONTEXT_TAKEOVER,
+                    client_no_context_takeover=settings.WS_COMPRESSION_CLIENT_NO_CONTEXT_TAKEOVER,
+                    server_max_window_bits=settings.WS_COMPRESSION_MAX_WINDOW_BITS,
+                    compress_settings={"level": settings.WS_COMPRESSION_LEVEL},
+                )
+            )
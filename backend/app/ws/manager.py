@@ -1,39 +1,237 @@
+import asyncio
+import contextlib
+import itertools
 import uuid
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from fastapi import WebSocket
 
+from app.config import settings
+from app.ws.backplane import Backplane, Handler, create_backplane
+from app.ws.codec import MSGPACK_PROTOCOL, encode_json, encode_msgpack, pack_msgpack_array
+
+# Per-room state snapshots: only the newest one matters, so a socket never
+# has more than one of them queued per room.
+COALESCED_EVENTS = {"typing"}
+
+# "Try Again Later": the client fell too far behind and should reconnect.
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class Frame:
+    """A message encoded once per wire format and shared by every recipient of a broadcast.
+
+    Each encoding is produced on first use, so a room with only JSON (or only
+    MessagePack) clients never pays for the other.
+    """
+
+    __slots__ = ("type", "message", "_text", "_binary")
+
+    def __init__(self, message: dict[str, Any]):
+        self.type = message.get("type")
+        self.message = message
+        self._text: str | None = None
+        self._binary: bytes | None = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = encode_json(self.message)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = encode_msgpack(self.message)
+        return self._binary
+
+
+class Connection:
+    """One socket of a user: its room subscriptions, outbound queue and writer task.
+
+    A user may hold several at once (tabs, devices); slots keep each record small.
+    A batching connection gets every event queued within WS_BATCH_WINDOW_MS
+    packed into one array frame instead of one frame per event; a binary one
+    speaks MessagePack instead of JSON.
+    """
+
+    __slots__ = (
+        "id",
+        "websocket",
+        "user_id",
+        "batch",
+        "binary",
+        "deflate",
+        "rooms",
+        "queue",
+        "snapshots",
+        "writer",
+    )
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self, websocket: WebSocket, user_id: uuid.UUID, batch: bool = False, binary: bool = False
+    ):
+        self.id = next(self._ids)
+        self.websocket = websocket
+        self.user_id = user_id
+        self.batch = batch
+        self.binary = binary
+        # Compression counters the server protocol keeps for this socket, if any
+        self.deflate = websocket.scope.get("state", {}).get("ws_deflate")
+        self.rooms: set[uuid.UUID] = set()
+        self.queue: asyncio.Queue[Frame] = asyncio.Queue()
+        # (type, group_id) -> newest coalesced frame, for those with one queued
+        self.snapshots: dict[tuple[str, Any], Frame] = {}
+        self.writer: asyncio.Task | None = None
+
+    def enqueue(self, frame: Frame) -> bool:
+        """Queue a frame; returns False once the socket is past the high-water mark.
+
+        A snapshot that only replaces one already queued adds nothing, so it
+        never counts against the mark.
+        """
+        key = None
+        if frame.type in COALESCED_EVENTS:
+            key = (frame.type, frame.message.get("group_id"))
+            if key in self.snapshots:
+                # The frame already in the queue stands in for this one
+                self.snapshots[key] = frame
+                return True
+        if self.queue.qsize() >= settings.WS_SEND_QUEUE_MAX:
+            return False
+        if key is not None:
+            self.snapshots[key] = frame
+        self.queue.put_nowait(frame)
+        return True
+
+    def latest(self, frame: Frame) -> Frame:
+        """What to send for a dequeued frame: the newest snapshot it stands in for."""
+        if frame.type in COALESCED_EVENTS:
+            return self.snapshots.pop((frame.type, frame.message.get("group_id")), frame)
+        return frame
+
 
 class ConnectionManager:
-    def __init__(self):
-        # group_id -> {user_id -> WebSocket}
-        self.rooms: dict[uuid.UUID, dict[uuid.UUID, WebSocket]] = {}
-        # user_id -> set of group_ids
-        self.user_groups: dict[uuid.UUID, set[uuid.UUID]] = {}
-        # user_id -> WebSocket
-        self.active_users: dict[uuid.UUID, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, user_id: uuid.UUID):
-        await websocket.accept()
-        self.active_users[user_id] = websocket
-        self.user_groups[user_id] = set()
-
-    def disconnect(self, user_id: uuid.UUID):
-        for group_id in self.user_groups.get(user_id, set()):
-            if group_id in self.rooms:
-                self.rooms[group_id].pop(user_id, None)
-                if not self.rooms[group_id]:
+    def __init__(self, backplane: Backplane | None = None):
+        # group_id -> connections subscribed to it
+        self.rooms: dict[uuid.UUID, set[Connection]] = {}
+        # user_id -> that user's open connections
+        self.active_users: dict[uuid.UUID, set[Connection]] = {}
+        # close handshakes and offline hooks, kept referenced until done
+        self._background: set[asyncio.Task] = set()
+        self._on_user_offline: Callable[[uuid.UUID], Awaitable[None]] | None = None
+        # Broadcasts go through the backplane so that every worker delivers
+        # them to its own sockets; handlers are keyed by envelope "kind".
+        self.backplane = backplane or Backplane()
+        self._handlers: dict[str, Handler] = {
+            "room": self._deliver_to_room,
+            "all": self._deliver_to_all,
+        }
+
+    async def start(self):
+        await self.backplane.start(self.dispatch)
+
+    async def stop(self):
+        await self.backplane.stop()
+
+    def on(self, kind: str, handler: Handler):
+        """Register a handler for backplane envelopes of the given kind."""
+        self._handlers[kind] = handler
+
+    def on_user_offline(self, handler: Callable[[uuid.UUID], Awaitable[None]]):
+        """Register the coroutine run when a user's last socket on this worker goes away."""
+        self._on_user_offline = handler
+
+    async def publish(self, kind: str, **data: Any):
+        await self.backplane.publish({"kind": kind, **data})
+
+    async def dispatch(self, envelope: dict[str, Any]):
+        handler = self._handlers.get(envelope.get("kind"))
+        if handler:
+            await handler(envelope)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: uuid.UUID,
+        batch: bool = False,
+        subprotocol: str | None = None,
+    ) -> Connection:
+        await websocket.accept(subprotocol=subprotocol)
+        conn = Connection(websocket, user_id, batch, subprotocol == MSGPACK_PROTOCOL)
+        write_loop = self._write_batches if batch else self._write_loop
+        conn.writer = asyncio.create_task(write_loop(conn))
+        self.active_users.setdefault(user_id, set()).add(conn)
+        return conn
+
+    def disconnect(self, conn: Connection) -> bool:
+        """Drop a connection; returns True if it was the user's last one.
+
+        Safe to call more than once: the reader, the writer and eviction may
+        all drop the same socket, but only the first call counts, and that
+        one runs the offline hook.
+        """
+        if conn.writer and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+        sessions = self.active_users.get(conn.user_id)
+        if not sessions or conn not in sessions:
+            return False
+        for group_id in conn.rooms:
+            room = self.rooms.get(group_id)
+            if room is not None:
+                room.discard(conn)
+                if not room:
                     del self.rooms[group_id]
-        self.user_groups.pop(user_id, None)
-        self.active_users.pop(user_id, None)
+        conn.rooms.clear()
+        sessions.discard(conn)
+        if sessions:
+            return False
+        del self.active_users[conn.user_id]
+        if self._on_user_offline:
+            self._spawn(self._on_user_offline(conn.user_id))
+        return True
+
+    def join_room(self, conn: Connection, group_id: uuid.UUID):
+        self.rooms.setdefault(group_id, set()).add(conn)
+        conn.rooms.add(group_id)
+
+    def join_user_to_room(self, user_id: uuid.UUID, group_id: uuid.UUID):
+        for conn in self.active_users.get(user_id, ()):
+            self.join_room(conn, group_id)
 
-    def join_room(self, user_id: uuid.UUID, group_id: uuid.UUID):
-        if group_id not in self.rooms:
-            self.rooms[group_id] = {}
-        ws = self.active_users.get(user_id)
-        if ws:
-            self.rooms[group_id][user_id] = ws
-            self.user_groups[user_id].add(group_id)
+    def leave_room(self, conn: Connection, group_id: uuid.UUID):
+        room = self.rooms.get(group_id)
+        if room is not None:
+            room.discard(conn)
+            if not room:
+                del self.rooms[group_id]
+        conn.rooms.discard(group_id)
+
+    def remove_user_from_room(self, user_id: uuid.UUID, group_id: uuid.UUID):
+        for conn in self.active_users.get(user_id, ()):
+            self.leave_room(conn, group_id)
+
+    def compression_stats(self) -> dict[str, Any]:
+        """Raw vs wire bytes of this worker's sockets, in total and per connection."""
+        connections = [
+            {"id": conn.id, "user_id": str(conn.user_id), **conn.deflate.as_dict()}
+            for sessions in self.active_users.values()
+            for conn in sessions
+            if conn.deflate is not None
+        ]
+        raw = sum(c["raw_bytes"] for c in connections)
+        wire = sum(c["wire_bytes"] for c in connections)
+        return {
+            "raw_bytes": raw,
+            "wire_bytes": wire,
+            "ratio": round(wire / raw, 4) if raw else None,
+            "connections": connections,
+        }
+
+    def session_count(self, user_id: uuid.UUID) -> int:
+        return len(self.active_users.get(user_id, ()))
 
     async def broadcast_to_room(
         self,
@@ -41,33 +239,109 @@ class ConnectionManager:
         message: dict[str, Any],
         exclude_user: uuid.UUID | None = None,
     ):
-        if group_id not in self.rooms:
-            return
-        disconnected = []
-        for uid, ws in self.rooms[group_id].items():
-            if uid == exclude_user:
-                continue
-            try:
-                await ws.send_json(message)
-            except Exception:
-                disconnected.append(uid)
-        for uid in disconnected:
-            self.disconnect(uid)
+        await self.publish(
+            "room",
+            group_id=str(group_id),
+            exclude_user=str(exclude_user) if exclude_user else None,
+            event=message,
+        )
 
     async def broadcast_to_all(self, message: dict[str, Any], exclude_user: uuid.UUID | None = None):
-        disconnected = []
-        for uid, ws in self.active_users.items():
-            if uid == exclude_user:
-                continue
-            try:
-                await ws.send_json(message)
-            except Exception:
-                disconnected.append(uid)
-        for uid in disconnected:
-            self.disconnect(uid)
-
-    def get_online_user_ids(self) -> list[str]:
-        return [str(uid) for uid in self.active_users.keys()]
-
-
-manager = ConnectionManager()
+        await self.publish(
+            "all",
+            exclude_user=str(exclude_user) if exclude_user else None,
+            event=message,
+        )
+
+    def send_to_connection(self, conn: Connection, message: dict[str, Any]):
+        """Reply to a single socket of this worker, e.g. the answer to a command."""
+        if not conn.enqueue(Frame(message)):
+            self._evict(conn)
+
+    def send_to_local_room(self, group_id: uuid.UUID, message: dict[str, Any]):
+        """Deliver to this worker's sockets in a room only, bypassing the backplane."""
+        room = self.rooms.get(group_id)
+        if room:
+            self._fan_out(room, message, None)
+
+    def send_to_local(self, message: dict[str, Any], exclude_user: uuid.UUID | None = None):
+        """Deliver to every socket on this worker only, bypassing the backplane."""
+        connections = [conn for sessions in self.active_users.values() for conn in sessions]
+        self._fan_out(connections, message, exclude_user)
+
+    async def _deliver_to_room(self, envelope: dict[str, Any]):
+        room = self.rooms.get(uuid.UUID(envelope["group_id"]))
+        if room:
+            self._fan_out(room, envelope["event"], _parse_user(envelope))
+
+    async def _deliver_to_all(self, envelope: dict[str, Any]):
+        self.send_to_local(envelope["event"], _parse_user(envelope))
+
+    def _fan_out(self, connections, message: dict[str, Any], exclude_user: uuid.UUID | None):
+        # Encode once for the whole fan-out, then only enqueue: each socket's
+        # writer task does the actual send, so one stalled client cannot hold
+        # up the rest of the room.
+        frame = Frame(message)
+        slow = [
+            conn
+            for conn in connections
+            if conn.user_id != exclude_user and not conn.enqueue(frame)
+        ]
+        for conn in slow:
+            self._evict(conn)
+
+    async def _write_loop(self, conn: Connection):
+        try:
+            while True:
+                frame = conn.latest(await conn.queue.get())
+                if conn.binary:
+                    await conn.websocket.send_bytes(frame.binary)
+                else:
+                    await conn.websocket.send_text(frame.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(conn)
+
+    async def _write_batches(self, conn: Connection):
+        # Frames are already encoded, so a batch is just their texts joined
+        # into an array: no re-encoding, one send for the whole burst.
+        window = settings.WS_BATCH_WINDOW_MS / 1000
+        try:
+            while True:
+                frames = [await conn.queue.get()]
+                if window:
+                    await asyncio.sleep(window)
+                while len(frames) < settings.WS_BATCH_MAX_EVENTS and not conn.queue.empty():
+                    frames.append(conn.queue.get_nowait())
+                frames = [conn.latest(frame) for frame in frames]
+                if conn.binary:
+                    await conn.websocket.send_bytes(pack_msgpack_array([f.binary for f in frames]))
+                else:
+                    await conn.websocket.send_text("[" + ",".join(f.text for f in frames) + "]")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(conn)
+
+    def _evict(self, conn: Connection):
+        self.disconnect(conn)
+        self._spawn(self._close(conn.websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    def _spawn(self, coro: Awaitable[None]):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        with contextlib.suppress(Exception):
+            await websocket.close(code=code)
+
+
+def _parse_user(envelope: dict[str, Any]) -> uuid.UUID | None:
+    user_id = envelope.get("exclude_user")
+    return uuid.UUID(user_id) if user_id else None
+
+
+manager = ConnectionManager(create_backplane())
@@ -1,17 +1,22 @@
 import uuid
-from datetime import datetime, timezone
+from typing import Any
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from sqlalchemy import select
 from jose import JWTError
 
-from app.database import AsyncSessionLocal
-from app.utils.security import decode_access_token
-from app.models.user import User
-from app.models.group_member import GroupMember
-from app.models.message import Message
-from app.models.file_attachment import FileAttachment
-from app.ws.manager import manager
+from app.database import ReadSessionLocal
+from app.ws.codec import decode_msgpack, negotiate_protocol
+from app.ws.manager import Connection, manager
+from app.services.message_writer import message_writer
+from app.services.user_cache import user_cache
+from app.services.auth_cache import auth_cache
+from app.services.presence import presence
+from app.services.typing import typing_aggregator
+from app.services.membership import membership
+from app.services.message_sync import sync_messages
+
+# Per-group cap on a WS sync reply; the client re-syncs while has_more is set
+WS_SYNC_LIMIT = 100
 
 router = APIRouter()
 
@@ -21,8 +26,7 @@ async def authenticate_ws(websocket: WebSocket) -> uuid.UUID | None:
     if not token:
         return None
     try:
-        payload = decode_access_token(token)
-        return uuid.UUID(payload["sub"])
+        return auth_cache.user_id(token)
     except (JWTError, KeyError, ValueError):
         return None
 
@@ -34,120 +38,90 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close(code=4001, reason="Unauthorized")
         return
 
-    await manager.connect(websocket, user_id)
+    # ?batch=1 opts in to array frames, both ways; the subprotocol picks the encoding
+    batch = websocket.query_params.get("batch") == "1"
+    subprotocol = negotiate_protocol(websocket.scope.get("subprotocols", []))
+    conn = await manager.connect(websocket, user_id, batch, subprotocol)
+    first_session = manager.session_count(user_id) == 1
 
-    # Mark user online and join all their groups
-    async with AsyncSessionLocal() as db:
-        user = await db.get(User, user_id)
-        if user:
-            user.is_online = True
-            await db.commit()
+    # Warm the profile their messages are enriched from; a hit runs no query
+    async with ReadSessionLocal() as db:
+        await user_cache.get_many(db, (user_id,))
 
-        result = await db.execute(
-            select(GroupMember.group_id).where(GroupMember.user_id == user_id)
-        )
-        group_ids = [row[0] for row in result.all()]
-        for gid in group_ids:
-            manager.join_room(user_id, gid)
-
-    # Broadcast online status
-    await manager.broadcast_to_all(
-        {"type": "user_status", "user_id": str(user_id), "is_online": True},
-        exclude_user=user_id,
-    )
+    # Join all their groups
+    for gid in await membership.load(user_id):
+        manager.join_room(conn, gid)
+
+    # Presence broadcasts user_status once the user is online anywhere
+    if first_session:
+        await presence.connected(user_id)
 
     try:
         while True:
-            data = await websocket.receive_json()
-            await handle_ws_message(user_id, data)
+            data = await receive(conn)
+            if isinstance(data, list):
+                for command in data:
+                    await handle_ws_message(conn, command)
+            else:
+                await handle_ws_message(conn, data)
     except WebSocketDisconnect:
         pass
     except Exception:
         pass
     finally:
-        manager.disconnect(user_id)
-        async with AsyncSessionLocal() as db:
-            user = await db.get(User, user_id)
-            if user:
-                user.is_online = False
-                user.last_seen = datetime.now(timezone.utc)
-                await db.commit()
-        await manager.broadcast_to_all(
-            {"type": "user_status", "user_id": str(user_id), "is_online": False},
-        )
+        # Other tabs or devices of the same user keep them online; the last
+        # one to go runs presence.disconnected, even if eviction got there first
+        manager.disconnect(conn)
 
 
-async def handle_ws_message(sender_id: uuid.UUID, data: dict):
+async def receive(conn: Connection) -> Any:
+    if conn.binary:
+        return decode_msgpack(await conn.websocket.receive_bytes())
+    return await conn.websocket.receive_json()
+
+
+async def handle_ws_message(conn: Connection, data: dict):
+    sender_id = conn.user_id
     msg_type = data.get("type")
 
+    if msg_type == "sync":
+        await handle_sync(conn, data)
+        return
+
+    if msg_type not in ("chat_message", "typing", "join_room"):
+        return
+
+    # Every command targets a group; ignore those for groups the user is not in
+    group_id = uuid.UUID(data["group_id"])
+    if not await membership.is_member(sender_id, group_id):
+        return
+
     if msg_type == "chat_message":
-        group_id = uuid.UUID(data["group_id"])
         content = data.get("content")
         message_type = data.get("message_type", "text")
         file_attachment_id = data.get("file_attachment_id")
 
-        async with AsyncSessionLocal() as db:
-            msg = Message(
-                group_id=group_id,
-                sender_id=sender_id,
-                content=content,
-                message_type=message_type,
-            )
-            db.add(msg)
-            await db.flush()
-
-            attachment_data = None
-            if file_attachment_id:
-                attachment = await db.get(FileAttachment, uuid.UUID(file_attachment_id))
-                if attachment:
-                    attachment.message_id = msg.id
-                    attachment_data = {
-                        "id": str(attachment.id),
-                        "original_filename": attachment.original_filename,
-                        "file_size": attachment.file_size,
-                        "mime_type": attachment.mime_type,
-                    }
-
-            await db.commit()
-
-            # Get sender info
-            sender = await db.get(User, sender_id)
-            sender_data = None
-            if sender:
-                sender_data = {
-                    "id": str(sender.id),
-                    "username": sender.username,
-                    "display_name": sender.display_name,
-                    "avatar_color": sender.avatar_color,
-                }
-
-            broadcast = {
-                "type": "chat_message",
-                "id": str(msg.id),
-                "group_id": str(group_id),
-                "sender_id": str(sender_id),
-                "sender": sender_data,
-                "content": content,
-                "message_type": message_type,
-                "created_at": msg.created_at.isoformat(),
-                "file_attachment": attachment_data,
-            }
-
+        broadcast = await message_writer.submit(
+            group_id=group_id,
+            sender_id=sender_id,
+            content=content,
+            message_type=message_type,
+            file_attachment_id=uuid.UUID(file_attachment_id) if file_attachment_id else None,
+        )
         await manager.broadcast_to_room(group_id, broadcast)
 
     elif msg_type == "typing":
-        group_id = uuid.UUID(data["group_id"])
-        await manager.broadcast_to_room(
-            group_id,
-            {
-                "type": "typing",
-                "group_id": str(group_id),
-                "user_id": str(sender_id),
-                "is_typing": data.get("is_typing", True),
-            },
-            exclude_user=sender_id,
-        )
+        await typing_aggregator.update(group_id, sender_id, bool(data.get("is_typing", True)))
 
     elif msg_type == "join_room":
-        group_id = uuid.UUID(data["group_id"])
-        manager.join_room(sender_id, group_id)
+        manager.join_room(conn, group_id)
+
+
+async def handle_sync(conn: Connection, data: dict):
+    cursors = {uuid.UUID(gid): int(seq) for gid, seq in data.get("cursors", {}).items()}
+    async with ReadSessionLocal() as db:
+        groups = await sync_messages(db, conn.user_id, cursors, WS_SYNC_LIMIT)
+    manager.send_to_connection(
+        conn,
+        {"type": "sync", "groups": [g.model_dump() for g in groups]},
+    )
@@ -0,0 +1,63 @@
+"""Benchmark authenticated REST throughput against a running server.
+
+Registers a throwaway user, then hammers GET /api/users/me and
+GET /api/messages/{group_id} (the global group) with concurrent clients and
+prints requests/sec for each. Start the server once with AUTH_CACHE_TTL=0
+to get the uncached baseline, then with the default to compare.
+
+Needs httpx (pip install httpx), which the app itself does not use.
+
+    python -m scripts.bench_auth_rps --url http://localhost:8000 --seconds 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, counts: list[int]):
+    while time.perf_counter() < deadline:
+        response = await client.get(path)
+        response.raise_for_status()
+        counts[0] += 1
+
+
+async def measure(client: httpx.AsyncClient, path: str, concurrency: int, seconds: float) -> float:
+    counts = [0]
+    started = time.perf_counter()
+    deadline = started + seconds
+    await asyncio.gather(*(worker(client, path, deadline, counts) for _ in range(concurrency)))
+    return counts[0] / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        username = f"bench_{uuid.uuid4().hex[:8]}"
+        response = await client.post(
+            "/api/auth/register",
+            json={"username": username, "password": "bench-password", "display_name": "Bench"},
+        )
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        groups = (await client.get("/api/groups/")).json()
+        paths = ["/api/users/me"] + [f"/api/messages/{g['id']}" for g in groups[:1]]
+        for path in paths:
+            rps = await measure(client, path, args.concurrency, args.seconds)
+            print(f"{path:<55} {rps:9.1f} req/s")
+
+        stats = (await client.get("/api/stats/")).json()
+        print("auth cache:", stats.get("auth"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""Benchmark concurrent large attachment downloads and backend CPU.
+
+Uploads one file of --size MB, then has --concurrency clients download it in
+a loop for --seconds and prints aggregate throughput. With --backend-pid
+(repeat it for every uvicorn worker) the CPU seconds those processes burned
+during the run are read from /proc and printed as well.
+
+Run it twice against the nginx frontend to compare the two modes:
+
+    # backend streams the bytes itself
+    FILE_ACCEL_REDIRECT= docker compose up -d
+    python -m scripts.bench_file_downloads --url http://localhost:3000 \\
+        --backend-pid $(pgrep -f app.server | head -1)
+
+    # nginx serves them from the shared uploads volume via sendfile
+    FILE_ACCEL_REDIRECT=/protected-uploads/ docker compose up -d
+    python -m scripts.bench_file_downloads --url http://localhost:3000 \\
+        --backend-pid $(pgrep -f app.server | head -1)
+
+Needs httpx (pip install httpx), which the app itself does not use.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import httpx
+
+
+def cpu_seconds(pids: list[int]) -> float:
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; utime and stime are 14 and 15
+            fields = f.read().rsplit(")", 1)[1].split()
+        total += int(fields[11]) + int(fields[12])
+    return total / ticks
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, totals: list[int]):
+    while time.perf_counter() < deadline:
+        async with client.stream("GET", path) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_raw():
+                totals[0] += len(chunk)
+        totals[1] += 1
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:3000")
+    parser.add_argument("--size", type=int, default=50, help="file size in MB")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--backend-pid", type=int, action="append", default=[])
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        username = f"bench_{uuid.uuid4().hex[:8]}"
+        response = await client.post(
+            "/api/auth/register",
+            json={"username": username, "password": "bench-password", "display_name": "Bench"},
+        )
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        payload = os.urandom(args.size * 1024 * 1024)
+        response = await client.post(
+            "/api/files/upload", files={"file": ("bench.bin", payload, "application/octet-stream")}
+        )
+        response.raise_for_status()
+        path = f"/api/files/{response.json()['id']}"
+
+        # One warm-up fetch fills the attachment cache and the page cache
+        response = await client.get(path)
+        response.raise_for_status()
+        if "x-accel-redirect" in response.headers:
+            raise SystemExit("X-Accel-Redirect reached the client; --url must point at nginx")
+        print(f"downloading {args.size} MB x {args.concurrency} clients for {args.seconds:g}s")
+
+        totals = [0, 0]
+        cpu_before = cpu_seconds(args.backend_pid) if args.backend_pid else 0.0
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(*(worker(client, path, deadline, totals) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        print(f"downloads:  {totals[1]}")
+        print(f"throughput: {totals[0] / elapsed / 1024 / 1024:,.1f} MB/s")
+        if args.backend_pid:
+            cpu = cpu_seconds(args.backend_pid) - cpu_before
+            print(f"backend CPU: {cpu:.2f}s ({cpu / elapsed * 100:.0f}% of one core)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""Benchmark keyset message pagination deep in history.
+
+Seeds N messages (default 10M) spread across a handful of groups, then times
+page fetches at increasing depths using the same keyset predicate as
+GET /api/messages/{group_id}. With ix_messages_group_created_id in place the
+per-page latency should stay flat regardless of depth; the OFFSET column is
+printed alongside for contrast.
+
+    python -m scripts.bench_message_pagination --messages 10000000 --groups 20
+
+Run against a throwaway database: the seeded rows are not cleaned up unless
+--cleanup is given.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.database import engine
+
+PAGE = 50
+
+
+async def seed(conn, groups: int, messages: int) -> tuple[uuid.UUID, list[uuid.UUID]]:
+    user_id = uuid.uuid4()
+    await conn.execute(
+        text(
+            "INSERT INTO users (id, username, password_hash, display_name) "
+            "VALUES (:id, :username, 'x', 'bench')"
+        ),
+        {"id": user_id, "username": f"bench-{user_id.hex[:8]}"},
+    )
+    group_ids = [uuid.uuid4() for _ in range(groups)]
+    for gid in group_ids:
+        await conn.execute(
+            text("INSERT INTO groups (id, name, created_by) VALUES (:id, 'bench', :uid)"),
+            {"id": gid, "uid": user_id},
+        )
+
+    # Three messages per second per group, so created_at collides on purpose
+    # and the id tie-break is exercised.
+    batch = 1_000_000
+    for start in range(0, messages, batch):
+        count = min(batch, messages - start)
+        await conn.execute(
+            text(
+                "INSERT INTO messages (id, group_id, seq, sender_id, content, message_type, created_at) "
+                "SELECT gen_random_uuid(), (CAST(:gids AS uuid[]))[1 + (n % :groups)], 1 + n / :groups, "
+                "       :uid, 'bench', 'text', "
+                "       timestamptz '2020-01-01' + ((n / :groups) / 3) * interval '1 second' "
+                "FROM generate_series(:start, :stop) AS n"
+            ),
+            {"gids": group_ids, "groups": groups, "uid": user_id, "start": start, "stop": start + count - 1},
+        )
+        print(f"seeded {start + count:,}/{messages:,}")
+    await conn.execute(
+        text(
+            "UPDATE groups g SET last_seq = (SELECT max(seq) FROM messages WHERE group_id = g.id) "
+            "WHERE id = ANY(:gids)"
+        ),
+        {"gids": group_ids},
+    )
+    await conn.execute(text("ANALYZE messages"))
+    return user_id, group_ids
+
+
+async def time_query(conn, sql: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await conn.execute(text(sql), params)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def bench(group_id: uuid.UUID, depths: list[int], repeat: int) -> None:
+    keyset = (
+        "SELECT * FROM messages WHERE group_id = :gid AND (created_at, id) < (:ts, :mid) "
+        "ORDER BY created_at DESC, id DESC LIMIT :limit"
+    )
+    offset = (
+        "SELECT * FROM messages WHERE group_id = :gid "
+        "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT :limit"
+    )
+    print(f"{'depth':>12} {'keyset ms':>10} {'offset ms':>10}")
+    async with engine.connect() as conn:
+        for depth in depths:
+            # Locate the cursor row once; a client would already hold it.
+            row = (
+                await conn.execute(
+                    text(
+                        "SELECT created_at, id FROM messages WHERE group_id = :gid "
+                        "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT 1"
+                    ),
+                    {"gid": group_id, "offset": depth},
+                )
+            ).first()
+            if row is None:
+                break
+            params = {"gid": group_id, "ts": row.created_at, "mid": row.id, "limit": PAGE + 1}
+            keyset_ms = await time_query(conn, keyset, params, repeat)
+            offset_ms = await time_query(conn, offset, {"gid": group_id, "offset": depth, "limit": PAGE + 1}, repeat)
+            print(f"{depth:>12,} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        user_id, group_ids = await seed(conn, args.groups, args.messages)
+
+    per_group = args.messages // args.groups
+    depths = [0, 1_000, 10_000, 100_000]
+    depths += [d for d in (per_group // 2, per_group - PAGE) if d > depths[-1]]
+    await bench(group_ids[0], depths, args.repeat)
+
+    if args.cleanup:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM groups WHERE id = ANY(:gids)"), {"gids": group_ids})
+            await conn.execute(text("DELETE FROM users WHERE id = :uid"), {"uid": user_id})
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""Benchmark full-text message search on a large history.
+
+Seeds N messages (default 5M) across a handful of groups. Content is drawn
+from a synthetic vocabulary with a skewed (roughly Zipfian) distribution,
+so some terms match a large share of rows and others only a handful. It
+then times the query GET /api/messages/search runs, for rare, medium and
+common terms and a phrase, in both sort orders, and prints the first page
+latency and the match count for each.
+
+    python -m scripts.bench_message_search --messages 5000000 --groups 20
+
+Relevance sort ranks every match before it can return the first page, so
+expect it to grow with the match count of common terms. Recent sort and
+selective terms should stay well under 100ms with ix_messages_search_vector.
+
+Run against a throwaway database: the seeded rows are not cleaned up unless
+--cleanup is given.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.database import engine
+
+VOCABULARY = 20_000
+PAGE = 20
+TERMS = {
+    "common": "w1",
+    "medium": "w40",
+    "rare": "w9000",
+    "two terms": "w3 w25",
+    "phrase": '"w1 w2"',
+}
+
+
+async def seed(conn, groups: int, messages: int) -> tuple[uuid.UUID, list[uuid.UUID]]:
+    user_id = uuid.uuid4()
+    await conn.execute(
+        text(
+            "INSERT INTO users (id, username, password_hash, display_name) "
+            "VALUES (:id, :username, 'x', 'bench')"
+        ),
+        {"id": user_id, "username": f"bench-{user_id.hex[:8]}"},
+    )
+    group_ids = [uuid.uuid4() for _ in range(groups)]
+    for gid in group_ids:
+        await conn.execute(
+            text("INSERT INTO groups (id, name, created_by) VALUES (:id, 'bench', :uid)"),
+            {"id": gid, "uid": user_id},
+        )
+
+    # 4-12 words per message; cubing random() skews picks toward low word ids.
+    # The word subquery references n so it runs per row, not once.
+    batch = 500_000
+    for start in range(0, messages, batch):
+        count = min(batch, messages - start)
+        await conn.execute(
+            text(
+                "INSERT INTO messages (id, group_id, seq, sender_id, content, message_type, created_at) "
+                "SELECT gen_random_uuid(), (CAST(:gids AS uuid[]))[1 + (n % :groups)], 1 + n / :groups, "
+                "       :uid, "
+                "       (SELECT string_agg('w' || floor(power(random(), 3) * :vocab)::int, ' ') "
+                "        FROM generate_series(1, 4 + (n % 9))), "
+                "       'text', timestamptz '2020-01-01' + n * interval '1 second' "
+                "FROM generate_series(:start, :stop) AS n"
+            ),
+            {
+                "gids": group_ids,
+                "groups": groups,
+                "uid": user_id,
+                "vocab": VOCABULARY,
+                "start": start,
+                "stop": start + count - 1,
+            },
+        )
+        print(f"seeded {start + count:,}/{messages:,}")
+    await conn.execute(
+        text(
+            "UPDATE groups g SET last_seq = (SELECT max(seq) FROM messages WHERE group_id = g.id) "
+            "WHERE id = ANY(:gids)"
+        ),
+        {"gids": group_ids},
+    )
+    await conn.execute(text("ANALYZE messages"))
+    return user_id, group_ids
+
+
+async def time_query(conn, sql: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await conn.execute(text(sql), params)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def bench(group_ids: list[uuid.UUID], repeat: int) -> None:
+    match = (
+        "FROM messages WHERE search_vector @@ websearch_to_tsquery('simple'::regconfig, :q) "
+        "AND group_id = ANY(:gids) "
+    )
+    rank = "ts_rank(search_vector, websearch_to_tsquery('simple'::regconfig, :q))::float8"
+    queries = {
+        "relevance": f"SELECT *, {rank} AS rank {match}"
+        f"ORDER BY rank DESC, created_at DESC, id DESC LIMIT :limit",
+        "recent": f"SELECT * {match}ORDER BY created_at DESC, id DESC LIMIT :limit",
+    }
+    print(f"{'query':<12} {'q':<10} {'matches':>10} {'relevance ms':>13} {'recent ms':>10}")
+    async with engine.connect() as conn:
+        for label, q in TERMS.items():
+            params = {"q": q, "gids": group_ids, "limit": PAGE + 1}
+            matches = (await conn.execute(text(f"SELECT count(*) {match}"), params)).scalar()
+            timings = [await time_query(conn, sql, params, repeat) for sql in queries.values()]
+            print(f"{label:<12} {q:<10} {matches:>10,} {timings[0]:>13.2f} {timings[1]:>10.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5_000_000)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        user_id, group_ids = await seed(conn, args.groups, args.messages)
+
+    await bench(group_ids, args.repeat)
+
+    if args.cleanup:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM groups WHERE id = ANY(:gids)"), {"gids": group_ids})
+            await conn.execute(text("DELETE FROM users WHERE id = :uid"), {"uid": user_id})
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
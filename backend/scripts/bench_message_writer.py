@@ -0,0 +1,112 @@
+"""Benchmark chat message persistence: per-message commits vs the batched writer.
+
+Seeds a user and --groups groups, then has --concurrency senders store
+--messages chat messages in total, first one transaction per message (the
+old chat_message path: INSERT and flush, commit, sender lookup, with the
+seq bump it now needs), then through MessageWriter's group commits. Prints
+messages/sec for each, at every concurrency given.
+
+    python -m scripts.bench_message_writer --messages 2000 --concurrency 1 50 200
+
+Run against a throwaway database: the seeded rows are not cleaned up unless
+--cleanup is given.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import text, update
+
+from app.database import AsyncSessionLocal, engine
+from app.models.group import Group
+from app.models.message import Message
+from app.models.user import User
+from app.services.message_writer import message_writer
+
+
+async def seed(groups: int) -> tuple[uuid.UUID, list[uuid.UUID]]:
+    user_id = uuid.uuid4()
+    group_ids = [uuid.uuid4() for _ in range(groups)]
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, username, password_hash, display_name) "
+                "VALUES (:id, :username, 'x', 'bench')"
+            ),
+            {"id": user_id, "username": f"bench-{user_id.hex[:8]}"},
+        )
+        for gid in group_ids:
+            await conn.execute(
+                text("INSERT INTO groups (id, name, created_by) VALUES (:id, 'bench', :uid)"),
+                {"id": gid, "uid": user_id},
+            )
+    return user_id, group_ids
+
+
+async def per_message(group_id: uuid.UUID, sender_id: uuid.UUID, content: str):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Group)
+            .where(Group.id == group_id)
+            .values(last_seq=Group.last_seq + 1)
+            .returning(Group.last_seq)
+        )
+        message = Message(
+            group_id=group_id,
+            seq=result.scalar_one(),
+            sender_id=sender_id,
+            content=content,
+            message_type="text",
+            created_at=datetime.now(timezone.utc),
+        )
+        db.add(message)
+        await db.flush()
+        await db.commit()
+        await db.get(User, sender_id)
+
+
+async def batched(group_id: uuid.UUID, sender_id: uuid.UUID, content: str):
+    await message_writer.submit(group_id, sender_id, content, "text")
+
+
+async def measure(store, user_id, group_ids, messages: int, concurrency: int) -> float:
+    remaining = iter(range(messages))
+
+    async def sender():
+        for i in remaining:
+            await store(group_ids[i % len(group_ids)], user_id, f"bench message {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+    return messages / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 200])
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    user_id, group_ids = await seed(args.groups)
+    await message_writer.start()
+
+    print(f"{'concurrency':>11} {'per-message msg/s':>18} {'batched msg/s':>14}")
+    for concurrency in args.concurrency:
+        before = await measure(per_message, user_id, group_ids, args.messages, concurrency)
+        after = await measure(batched, user_id, group_ids, args.messages, concurrency)
+        print(f"{concurrency:>11} {before:>18,.0f} {after:>14,.0f}")
+
+    await message_writer.stop()
+    if args.cleanup:
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM groups WHERE id = ANY(:gids)"), {"gids": group_ids})
+            await conn.execute(text("DELETE FROM users WHERE id = :uid"), {"uid": user_id})
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
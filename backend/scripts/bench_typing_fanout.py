@@ -0,0 +1,94 @@
+"""Benchmark typing-indicator frame volume under a synthetic typing load.
+
+Puts --members fake sockets in one room, lets --typists of them "type" a
+keystroke every --keystroke-ms for --seconds, and counts the frames the
+server writes to sockets: first with the old per-keystroke broadcast, then
+through the typing aggregator. Runs in-process on the local backplane; no
+database or server is needed.
+
+    python -m scripts.bench_typing_fanout --members 200 --typists 5
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.ws.manager import manager
+from app.services.typing import typing_aggregator
+
+
+class CountingSocket:
+    """Stands in for a WebSocket; only counts what would be sent."""
+
+    scope: dict = {}
+    frames = 0
+
+    async def accept(self, subprotocol: str | None = None):
+        pass
+
+    async def send_text(self, text: str):
+        CountingSocket.frames += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def per_keystroke(group_id: uuid.UUID, user_id: uuid.UUID):
+    await manager.broadcast_to_room(
+        group_id,
+        {"type": "typing", "group_id": str(group_id), "user_id": str(user_id), "is_typing": True},
+        exclude_user=user_id,
+    )
+
+
+async def aggregated(group_id: uuid.UUID, user_id: uuid.UUID):
+    await typing_aggregator.update(group_id, user_id, True)
+
+
+async def run(name: str, on_keystroke, group_id, typists, args) -> None:
+    CountingSocket.frames = 0
+    keystrokes = 0
+    interval = args.keystroke_ms / 1000
+    deadline = time.perf_counter() + args.seconds
+
+    async def typist(user_id: uuid.UUID):
+        nonlocal keystrokes
+        while time.perf_counter() < deadline:
+            await on_keystroke(group_id, user_id)
+            keystrokes += 1
+            await asyncio.sleep(interval)
+
+    await asyncio.gather(*(typist(uid) for uid in typists))
+    await asyncio.sleep(0.1)  # let writer tasks drain
+    print(
+        f"{name:>13}: {keystrokes / args.seconds:8.1f} keystrokes/s -> "
+        f"{CountingSocket.frames / args.seconds:10.1f} frames/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--typists", type=int, default=5)
+    parser.add_argument("--keystroke-ms", type=int, default=150)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    await manager.start()
+    await typing_aggregator.start()
+    group_id = uuid.uuid4()
+    users = [uuid.uuid4() for _ in range(args.members)]
+    for user_id in users:
+        conn = await manager.connect(CountingSocket(), user_id)
+        manager.join_room(conn, group_id)
+    typists = users[: args.typists]
+
+    await run("per-keystroke", per_keystroke, group_id, typists, args)
+    await run("aggregated", aggregated, group_id, typists, args)
+
+    await typing_aggregator.stop()
+    await manager.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
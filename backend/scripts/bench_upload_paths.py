@@ -0,0 +1,105 @@
+"""Benchmark multipart vs raw-body uploads: MB/s and disk write amplification.
+
+Uploads --count files of --size MB (random bytes, so nothing deduplicates)
+through POST /api/files/upload (multipart, spooled by python-multipart) and
+POST /api/files/upload/raw (body streamed straight into storage), with
+--concurrency uploads in flight. Prints throughput for each path and, with
+--backend-pid (repeat it for every uvicorn worker), the bytes the backend
+wrote per uploaded byte: wchar counts write() calls, write_bytes what
+reached the block layer. Reading /proc/<pid>/io needs the same user or root.
+
+    python -m scripts.bench_upload_paths --url http://localhost:8000 \\
+        --backend-pid $(pgrep -f app.server | head -1)
+
+Needs httpx (pip install httpx), which the app itself does not use.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import httpx
+
+
+def io_counters(pids: list[int]) -> dict[str, int]:
+    totals = {"wchar": 0, "write_bytes": 0}
+    for pid in pids:
+        with open(f"/proc/{pid}/io") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in totals:
+                    totals[key] += int(value)
+    return totals
+
+
+async def upload_multipart(client: httpx.AsyncClient, payload: bytes):
+    response = await client.post(
+        "/api/files/upload", files={"file": ("bench.bin", payload, "application/octet-stream")}
+    )
+    response.raise_for_status()
+
+
+async def upload_raw(client: httpx.AsyncClient, payload: bytes):
+    response = await client.post(
+        "/api/files/upload/raw",
+        params={"filename": "bench.bin"},
+        content=payload,
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    response.raise_for_status()
+
+
+async def measure(client, upload, size: int, count: int, concurrency: int, pids: list[int]):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        # Fresh bytes per file: identical content would dedupe into one blob
+        payload = os.urandom(size)
+        async with semaphore:
+            await upload(client, payload)
+
+    before = io_counters(pids) if pids else None
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+
+    line = f"{upload.__name__:<18} {size * count / elapsed / 1024 / 1024:9.1f} MB/s"
+    if before is not None:
+        # Let writeback catch up so write_bytes reflects this run
+        await asyncio.sleep(1)
+        after = io_counters(pids)
+        uploaded = size * count
+        line += (
+            f"   wchar x{(after['wchar'] - before['wchar']) / uploaded:.2f}"
+            f"   write_bytes x{(after['write_bytes'] - before['write_bytes']) / uploaded:.2f}"
+        )
+    print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--size", type=int, default=20, help="file size in MB")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--backend-pid", type=int, action="append", default=[])
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        username = f"bench_{uuid.uuid4().hex[:8]}"
+        response = await client.post(
+            "/api/auth/register",
+            json={"username": username, "password": "bench-password", "display_name": "Bench"},
+        )
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        size = args.size * 1024 * 1024
+        for upload in (upload_multipart, upload_raw):
+            await measure(client, upload, size, args.count, args.concurrency, args.backend_pid)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""Compare JSON and MessagePack /ws encodings on representative event mixes.
+
+Builds chat, typing, presence and sync events shaped like the real ones
+(UUIDs and datetimes native, as the server builds them before they cross
+the backplane), then reports bytes per event and encode/decode throughput for each codec.
+No database or server is needed.
+
+    python -m scripts.bench_ws_codecs --events 20000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.ws.codec import decode_json, decode_msgpack, encode_json, encode_msgpack
+
+
+def sender() -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "username": "user" + str(random.randint(1, 500)),
+        "display_name": "Office User",
+        "avatar_color": "#3B82F6",
+    }
+
+
+def chat_message(group_id: str, seq: int) -> dict:
+    author = sender()
+    return {
+        "type": "chat_message",
+        "id": uuid.uuid4(),
+        "group_id": group_id,
+        "seq": seq,
+        "sender_id": author["id"],
+        "sender": author,
+        "content": "Sure, let's sync after lunch" * random.randint(1, 3),
+        "message_type": "text",
+        "created_at": datetime.now(timezone.utc),
+        "file_attachment": None,
+    }
+
+
+def typing(group_id: str) -> dict:
+    return {
+        "type": "typing",
+        "group_id": group_id,
+        "user_ids": [uuid.uuid4() for _ in range(random.randint(0, 3))],
+    }
+
+
+def user_status() -> dict:
+    return {"type": "user_status", "user_id": uuid.uuid4(), "is_online": random.random() < 0.5}
+
+
+def sync(group_id: str) -> dict:
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    messages = []
+    for seq in range(1, 51):
+        message = chat_message(group_id, seq)
+        del message["type"]
+        message["created_at"] = start + timedelta(seconds=seq)
+        messages.append(message)
+    return {"type": "sync", "groups": [{"group_id": group_id, "messages": messages, "has_more": False}]}
+
+
+MIXES = {
+    "chat-heavy": (("chat", 0.7), ("typing", 0.2), ("status", 0.1)),
+    "typing-heavy": (("chat", 0.2), ("typing", 0.7), ("status", 0.1)),
+    "reconnect": (("sync", 0.3), ("status", 0.7)),
+}
+
+
+def build(mix: str, count: int) -> list[dict]:
+    group_id = uuid.uuid4()
+    kinds, weights = zip(*MIXES[mix])
+    makers = {
+        "chat": lambda i: chat_message(group_id, i),
+        "typing": lambda i: typing(group_id),
+        "status": lambda i: user_status(),
+        "sync": lambda i: sync(group_id),
+    }
+    return [makers[kind](i) for i, kind in enumerate(random.choices(kinds, weights, k=count))]
+
+
+def measure(events: list[dict], encode, decode) -> tuple[float, float, float]:
+    started = time.perf_counter()
+    encoded = [encode(event) for event in events]
+    encode_rate = len(events) / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for data in encoded:
+        decode(data)
+    decode_rate = len(events) / (time.perf_counter() - started)
+    size = sum(len(data.encode() if isinstance(data, str) else data) for data in encoded)
+    return size / len(events), encode_rate, decode_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'mix':<13} {'codec':<8} {'bytes/event':>12} {'encode/s':>12} {'decode/s':>12}")
+    for mix in MIXES:
+        events = build(mix, args.events)
+        for name, encode, decode in (
+            ("json", encode_json, decode_json),
+            ("msgpack", encode_msgpack, decode_msgpack),
+        ):
+            size, enc, dec = measure(events, encode, decode)
+            print(f"{mix:<13} {name:<8} {size:12.1f} {enc:12.0f} {dec:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark the encode cost of one broadcast at growing room sizes.
+
+For a typical chat_message, times what a broadcast to N recipients spends
+on serialization: once per recipient with the stdlib json module, as
+send_json per socket used to, against the single shared Frame the
+fan-out builds now. Reports the best of --repeat runs for each N. No
+database or server is needed.
+
+    python -m scripts.bench_ws_encode --repeat 20
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.ws.codec import orjson
+from app.ws.manager import Frame
+
+RECIPIENTS = (10, 100, 1_000, 10_000)
+
+
+def chat_message() -> dict:
+    sender_id = str(uuid.uuid4())
+    return {
+        "type": "chat_message",
+        "id": str(uuid.uuid4()),
+        "group_id": str(uuid.uuid4()),
+        "seq": 1234,
+        "sender_id": sender_id,
+        "sender": {
+            "id": sender_id,
+            "username": "user42",
+            "display_name": "Office User",
+            "avatar_color": "#3B82F6",
+        },
+        "content": "Sure, let's sync after lunch",
+        "message_type": "text",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "file_attachment": None,
+    }
+
+
+def per_recipient(message: dict, recipients: int):
+    for _ in range(recipients):
+        json.dumps(message)
+
+
+def shared_frame(message: dict, recipients: int):
+    frame = Frame(message)
+    for _ in range(recipients):
+        frame.text
+
+
+def best(fn, message: dict, recipients: int, repeat: int) -> float:
+    fastest = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(message, recipients)
+        fastest = min(fastest, time.perf_counter() - started)
+    return fastest * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    message = chat_message()
+    print(f"frame encoder: {'orjson' if orjson is not None else 'stdlib json'}")
+    print(f"{'recipients':>10} {'per recipient us':>17} {'shared frame us':>16}")
+    for recipients in RECIPIENTS:
+        before = best(per_recipient, message, recipients, args.repeat)
+        after = best(shared_frame, message, recipients, args.repeat)
+        print(f"{recipients:>10,} {before:>17.1f} {after:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
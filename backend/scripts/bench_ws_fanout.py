@@ -0,0 +1,103 @@
+"""Benchmark room fan-out latency with one stalled client in the room.
+
+Puts --members fake sockets in one room, one of which never completes a
+send, and pushes --broadcasts chat messages through the real
+ConnectionManager, one every --interval-ms. Reports p50/p99/max latency
+from broadcast to send across all deliveries, how many frames each healthy
+socket got and whether the stalled one was evicted. Runs in-process on the
+local backplane; no database or server is needed.
+
+    python -m scripts.bench_ws_fanout --members 1000 --broadcasts 600
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.config import settings
+from app.ws.codec import encode_json
+from app.ws.manager import manager
+
+
+class TimingSocket:
+    """Stands in for a WebSocket; records when each frame would have gone out."""
+
+    scope: dict = {}
+
+    def __init__(self):
+        self.sent: list[tuple[float, str]] = []
+
+    async def accept(self, subprotocol: str | None = None):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append((time.perf_counter(), text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class StalledSocket(TimingSocket):
+    """A client that stopped reading: the first send never completes."""
+
+    closed_with: int | None = None
+
+    async def send_text(self, text: str):
+        await asyncio.Event().wait()
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def percentile(values: list[float], p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--broadcasts", type=int, default=600)
+    parser.add_argument("--interval-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    await manager.start()
+    group_id = uuid.uuid4()
+    stalled = StalledSocket()
+    sockets = [TimingSocket() for _ in range(args.members - 1)]
+    for socket in [stalled, *sockets]:
+        conn = await manager.connect(socket, uuid.uuid4())
+        manager.join_room(conn, group_id)
+
+    # Every recipient gets the same encoded text, so it identifies the broadcast
+    sent_at: dict[str, float] = {}
+    for i in range(args.broadcasts):
+        message = {"type": "chat_message", "group_id": str(group_id), "seq": i, "content": "hi"}
+        sent_at[encode_json(message)] = time.perf_counter()
+        await manager.broadcast_to_room(group_id, message)
+        await asyncio.sleep(args.interval_ms / 1000)
+
+    # Healthy sockets evicted for falling behind would never catch up; stop waiting
+    expected = args.broadcasts
+    deadline = time.perf_counter() + 30
+    while any(len(s.sent) < expected for s in sockets) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+
+    latencies = sorted(
+        (at - sent_at[text]) * 1000 for socket in sockets for at, text in socket.sent
+    )
+    complete = sum(len(socket.sent) == expected for socket in sockets)
+    print(
+        f"members {args.members}, broadcasts {args.broadcasts}, "
+        f"queue max {settings.WS_SEND_QUEUE_MAX}"
+    )
+    print(
+        f"latency ms: p50 {percentile(latencies, 0.5):.2f}  "
+        f"p99 {percentile(latencies, 0.99):.2f}  max {latencies[-1]:.2f}"
+    )
+    print(f"healthy sockets with every frame: {complete}/{len(sockets)}")
+    print(f"stalled socket closed with: {stalled.closed_with}")
+    await manager.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import Request
+
+from app.api.files import download_file
+from app.config import settings
+from app.services.attachment_cache import AttachmentInfo, attachment_cache
+from app.utils.http_files import IMMUTABLE
+from tests.test_http_files import run
+
+ORIGINAL = b"original image bytes" * 100
+PREVIEW = b"preview jpeg"
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "FILE_ACCEL_REDIRECT", "")
+    (tmp_path / "original.png").write_bytes(ORIGINAL)
+    (tmp_path / "preview.jpg").write_bytes(PREVIEW)
+    return tmp_path
+
+
+def cached(thumbnail_filename: str | None) -> uuid.UUID:
+    info = AttachmentInfo(
+        id=uuid.uuid4(),
+        original_filename="photo.png",
+        stored_filename="original.png",
+        file_size=len(ORIGINAL),
+        mime_type="image/png",
+        created_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+        thumbnail_filename=thumbnail_filename,
+    )
+    attachment_cache._cache.set(info.id, info)
+    return info.id
+
+
+def download(file_id: uuid.UUID, variant: str | None):
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    response = asyncio.run(download_file(file_id, request, variant=variant, db=None))
+    return asyncio.run(run(response))
+
+
+def test_preview_before_rendering_is_not_immutable(uploads):
+    status, headers, body = download(cached(None), "preview")
+    assert status == 200
+    assert body == ORIGINAL
+    assert "immutable" not in headers["cache-control"]
+
+
+def test_preview_before_rendering_through_nginx_is_not_immutable(uploads, monkeypatch):
+    monkeypatch.setattr(settings, "FILE_ACCEL_REDIRECT", "/protected-uploads/")
+    _, headers, _ = download(cached(None), "preview")
+    assert headers["x-accel-redirect"] == "/protected-uploads/original.png"
+    assert "immutable" not in headers["cache-control"]
+
+
+def test_rendered_preview_is_immutable(uploads):
+    status, headers, body = download(cached("preview.jpg"), "preview")
+    assert status == 200
+    assert body == PREVIEW
+    assert headers["content-type"] == "image/jpeg"
+    assert headers["cache-control"] == IMMUTABLE
+
+
+def test_original_is_immutable(uploads):
+    _, headers, body = download(cached(None), None)
+    assert body == ORIGINAL
+    assert headers["cache-control"] == IMMUTABLE
@@ -0,0 +1,228 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import Request
+
+from app.utils.http_files import (
+    MAX_RANGES,
+    RangeNotSatisfiable,
+    file_response,
+    http_date,
+    parse_range,
+)
+
+ETAG = '"abc123"'
+MODIFIED = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+BODY = bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("bytes=0-99", [(0, 100)]),
+        ("bytes=-100", [(924, 1024)]),
+        ("bytes=-5000", [(0, 1024)]),
+        ("bytes=1000-", [(1000, 1024)]),
+        ("bytes=1000-5000", [(1000, 1024)]),
+        ("bytes=0-0", [(0, 1)]),
+        ("BYTES = 0-9", [(0, 10)]),
+        ("bytes=0-99, 50-149", [(0, 150)]),
+        ("bytes=100-199,0-99", [(0, 200)]),
+        ("bytes=0-9, 20-29, -10", [(0, 10), (20, 30), (1014, 1024)]),
+        ("bytes=0-9, 2000-3000", [(0, 10)]),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, len(BODY)) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        None,
+        "",
+        "items=0-9",
+        "bytes=",
+        "bytes=abc",
+        "bytes=5",
+        "bytes=-",
+        "bytes=9-5",
+        "bytes=0-9, 5-x",
+        "bytes=" + ",".join(f"{i * 10}-{i * 10}" for i in range(MAX_RANGES + 1)),
+    ],
+)
+def test_parse_range_ignored(header):
+    assert parse_range(header, len(BODY)) is None
+
+
+@pytest.mark.parametrize(
+    ("header", "size"),
+    [
+        ("bytes=1024-", 1024),
+        ("bytes=2000-3000", 1024),
+        ("bytes=-0", 1024),
+        ("bytes=0-", 0),
+        ("bytes=-10", 0),
+    ],
+)
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+def serve(path, headers: dict[str, str], size: int | None = None):
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+    response = file_response(
+        request,
+        str(path),
+        len(BODY) if size is None else size,
+        "application/octet-stream",
+        ETAG,
+        MODIFIED,
+        "data.bin",
+    )
+    return asyncio.run(run(response))
+
+
+async def run(response):
+    messages = []
+
+    async def receive():
+        # The client never goes away; a disconnect would cut streaming short
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await response({"type": "http", "method": "GET"}, receive, send)
+    start = messages[0]
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], headers, body
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(BODY)
+    return path
+
+
+def test_full_file(data_file):
+    status, headers, body = serve(data_file, {})
+    assert status == 200
+    assert body == BODY
+    assert headers["content-length"] == str(len(BODY))
+    assert headers["accept-ranges"] == "bytes"
+    assert headers["etag"] == ETAG
+
+
+def test_suffix_range(data_file):
+    status, headers, body = serve(data_file, {"Range": "bytes=-100"})
+    assert status == 206
+    assert body == BODY[-100:]
+    assert headers["content-range"] == f"bytes 924-1023/{len(BODY)}"
+    assert headers["content-length"] == "100"
+
+
+def test_open_ended_range(data_file):
+    status, headers, body = serve(data_file, {"Range": "bytes=1000-"})
+    assert status == 206
+    assert body == BODY[1000:]
+    assert headers["content-range"] == f"bytes 1000-1023/{len(BODY)}"
+
+
+def test_start_past_eof(data_file):
+    status, headers, body = serve(data_file, {"Range": "bytes=5000-"})
+    assert status == 416
+    assert headers["content-range"] == f"bytes */{len(BODY)}"
+    assert body == b""
+
+
+def test_reversed_range_sends_whole_file(data_file):
+    status, _, body = serve(data_file, {"Range": "bytes=500-100"})
+    assert status == 200
+    assert body == BODY
+
+
+def test_zero_length_file(tmp_path):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    status, headers, body = serve(path, {}, size=0)
+    assert status == 200
+    assert body == b""
+    assert headers["content-length"] == "0"
+
+    status, headers, _ = serve(path, {"Range": "bytes=0-"}, size=0)
+    assert status == 416
+    assert headers["content-range"] == "bytes */0"
+
+
+def test_overlapping_ranges_merge(data_file):
+    status, headers, body = serve(data_file, {"Range": "bytes=0-99,50-199"})
+    assert status == 206
+    assert body == BODY[:200]
+    assert headers["content-range"] == f"bytes 0-199/{len(BODY)}"
+
+
+def test_multiple_ranges(data_file):
+    status, headers, body = serve(data_file, {"Range": "bytes=0-9,100-109,-5"})
+    assert status == 206
+    media_type, _, boundary = headers["content-type"].partition("; boundary=")
+    assert media_type == "multipart/byteranges"
+    assert headers["content-length"] == str(len(body))
+
+    parts = body.split(f"--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    expected = [(0, 10), (100, 110), (len(BODY) - 5, len(BODY))]
+    for part, (start, end) in zip(parts[1:-1], expected, strict=True):
+        head, _, payload = part.partition(b"\r\n\r\n")
+        assert f"Content-Range: bytes {start}-{end - 1}/{len(BODY)}".encode() in head
+        assert payload == BODY[start:end] + b"\r\n"
+
+
+def test_if_range_match(data_file):
+    for validator in (ETAG, http_date(MODIFIED)):
+        status, _, body = serve(data_file, {"Range": "bytes=0-9", "If-Range": validator})
+        assert status == 206
+        assert body == BODY[:10]
+
+
+def test_if_range_mismatch_sends_whole_file(data_file):
+    for validator in ('"other"', 'W/"abc123"', "Tue, 30 Apr 2024 00:00:00 GMT"):
+        status, headers, body = serve(data_file, {"Range": "bytes=0-9", "If-Range": validator})
+        assert status == 200
+        assert body == BODY
+        assert "content-range" not in headers
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, 'W/"abc123"', '"other", "abc123"', "*"])
+def test_if_none_match(data_file, if_none_match):
+    status, headers, body = serve(data_file, {"If-None-Match": if_none_match, "Range": "bytes=0-9"})
+    assert status == 304
+    assert body == b""
+    assert headers["etag"] == ETAG
+
+
+def test_if_none_match_mismatch(data_file):
+    status, _, body = serve(data_file, {"If-None-Match": '"other"'})
+    assert status == 200
+    assert body == BODY
+
+
+def test_if_modified_since(data_file):
+    status, _, _ = serve(data_file, {"If-Modified-Since": http_date(MODIFIED)})
+    assert status == 304
+    # If-None-Match wins over If-Modified-Since
+    status, _, _ = serve(
+        data_file, {"If-None-Match": '"other"', "If-Modified-Since": http_date(MODIFIED)}
+    )
+    assert status == 200
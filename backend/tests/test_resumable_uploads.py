@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import os
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.models.upload_session import UploadSession
+from app.services import resumable_uploads as module
+from app.services.resumable_uploads import UploadClosed, resumable_uploads
+from app.utils.file_utils import get_file_path
+
+CHUNK = 1024
+CONTENT = os.urandom(CHUNK) + os.urandom(CHUNK // 2)
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    session = UploadSession(
+        id=uuid.uuid4(),
+        original_filename="notes.bin",
+        mime_type="application/octet-stream",
+        file_size=len(CONTENT),
+        chunk_size=CHUNK,
+    )
+    resumable_uploads.create(session)
+    return session
+
+
+async def body(data: bytes):
+    yield data
+
+
+def upload_all(session: UploadSession):
+    for index in range(resumable_uploads.chunk_count(session)):
+        data = CONTENT[index * CHUNK:(index + 1) * CHUNK]
+        asyncio.run(resumable_uploads.write_chunk(session, index, body(data)))
+
+
+def test_chunk_after_seal_is_refused(session):
+    upload_all(session)
+    assert resumable_uploads.seal(session)
+    assert not resumable_uploads.seal(session)
+    with pytest.raises(UploadClosed):
+        asyncio.run(resumable_uploads.write_chunk(session, 0, body(CONTENT[:CHUNK])))
+
+
+def test_writer_open_before_seal_cannot_change_stored_blob(session, monkeypatch):
+    upload_all(session)
+    # A chunk PUT that opened the data file just before the seal
+    late = open(os.path.join(resumable_uploads.directory(session.id), "data"), "r+b")
+    assert resumable_uploads.seal(session)
+
+    real_copy = module.copy_hashed
+
+    def copy_then_write(src, dst):
+        content_hash = real_copy(src, dst)
+        late.write(b"\0" * CHUNK)
+        late.close()
+        return content_hash
+
+    monkeypatch.setattr(module, "copy_hashed", copy_then_write)
+    stored_filename, content_hash = asyncio.run(resumable_uploads.finish(session))
+
+    assert content_hash == hashlib.sha256(CONTENT).hexdigest()
+    with open(get_file_path(stored_filename), "rb") as f:
+        assert f.read() == CONTENT
+    assert not os.path.exists(resumable_uploads.directory(session.id))
+
+
+def test_failed_finish_unseals(session, monkeypatch):
+    upload_all(session)
+    assert resumable_uploads.seal(session)
+
+    def fail(src, dst):
+        open(dst, "wb").close()
+        raise OSError("disk full")
+
+    monkeypatch.setattr(module, "copy_hashed", fail)
+    with pytest.raises(OSError):
+        asyncio.run(resumable_uploads.finish(session))
+
+    assert sorted(os.listdir(resumable_uploads.directory(session.id))) == ["0", "1", "data"]
+    assert resumable_uploads.seal(session)
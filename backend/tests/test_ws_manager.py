@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.ws.manager import Connection, Frame
+
+GROUP = str(uuid.uuid4())
+
+
+class StalledSocket:
+    """A WebSocket whose writer never gets to drain the queue."""
+
+    scope: dict = {}
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_MAX", 4)
+    return Connection(StalledSocket(), uuid.uuid4())
+
+
+def typing(*user_ids: str, group_id: str = GROUP) -> Frame:
+    return Frame({"type": "typing", "group_id": group_id, "user_ids": list(user_ids)})
+
+
+def chat(n: int) -> Frame:
+    return Frame({"type": "chat_message", "group_id": GROUP, "seq": n})
+
+
+def test_full_queue_refuses_new_frames(conn):
+    for n in range(settings.WS_SEND_QUEUE_MAX):
+        assert conn.enqueue(chat(n))
+    assert not conn.enqueue(chat(99))
+    assert not conn.enqueue(typing("a"))
+
+
+def test_typing_replacing_a_queued_snapshot_fits_a_full_queue(conn):
+    assert conn.enqueue(typing("a"))
+    for n in range(settings.WS_SEND_QUEUE_MAX - 1):
+        assert conn.enqueue(chat(n))
+
+    assert conn.enqueue(typing("a", "b"))
+    assert conn.enqueue(typing("b"))
+    assert conn.queue.qsize() == settings.WS_SEND_QUEUE_MAX
+    # Another room's snapshot would add a frame, so it still counts
+    assert not conn.enqueue(typing("c", group_id=str(uuid.uuid4())))
+
+    first = conn.queue.get_nowait()
+    assert conn.latest(first).message["user_ids"] == ["b"]
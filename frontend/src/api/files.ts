@@ -1,17 +1,119 @@
 import apiClient from './client';
-import { FileAttachment } from '../types';
+import { FileAttachment, UploadSession } from '../types';
+
+// Below this, hashing costs about as much as just sending the bytes
+const DEDUPE_MIN_SIZE = 256 * 1024;
+// Hashing reads the whole file into memory
+const DEDUPE_MAX_SIZE = 128 * 1024 * 1024;
+
+async function sha256Hex(file: File): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Ask the server whether this user already uploaded these bytes; if so it
+// records the attachment without an upload. crypto.subtle only exists in
+// secure contexts.
+async function dedupeFile(file: File): Promise<FileAttachment | null> {
+  if (file.size < DEDUPE_MIN_SIZE || file.size > DEDUPE_MAX_SIZE || !globalThis.crypto?.subtle) return null;
+  try {
+    const { data } = await apiClient.post('/files/dedupe', {
+      content_hash: await sha256Hex(file),
+      filename: file.name,
+      mime_type: file.type || 'application/octet-stream',
+    });
+    return data;
+  } catch {
+    return null;
+  }
+}
+
+// Files above this go through the resumable chunked API
+const RESUMABLE_MIN_SIZE = 16 * 1024 * 1024;
+const PARALLEL_CHUNKS = 3;
+const CHUNK_RETRIES = 5;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Same file picked again after a dropped connection resumes its session
+function resumeKey(file: File): string {
+  return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function openUploadSession(file: File): Promise<UploadSession> {
+  const key = resumeKey(file);
+  const uploadId = localStorage.getItem(key);
+  if (uploadId) {
+    try {
+      const { data } = await apiClient.get(`/files/uploads/${uploadId}`);
+      return data;
+    } catch {
+      localStorage.removeItem(key);
+    }
+  }
+  const { data } = await apiClient.post('/files/uploads', {
+    filename: file.name,
+    mime_type: file.type || 'application/octet-stream',
+    file_size: file.size,
+  });
+  localStorage.setItem(key, data.upload_id);
+  return data;
+}
+
+async function putChunk(session: UploadSession, file: File, index: number): Promise<void> {
+  const offset = index * session.chunk_size;
+  const chunk = file.slice(offset, offset + session.chunk_size);
+  for (let attempt = 0; ; attempt++) {
+    try {
+      await apiClient.put(`/files/uploads/${session.upload_id}`, chunk, {
+        params: { offset },
+        headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      return;
+    } catch (err) {
+      if (attempt >= CHUNK_RETRIES) throw err;
+      await sleep(Math.min(1000 * 2 ** attempt, 15000));
+    }
+  }
+}
+
+async function uploadResumable(file: File): Promise<FileAttachment> {
+  const session = await openUploadSession(file);
+  const done = new Set(session.received_chunks);
+  const pending: number[] = [];
+  for (let i = 0; i * session.chunk_size < session.file_size; i++) {
+    if (!done.has(i)) pending.push(i);
+  }
+  const worker = async () => {
+    for (let index = pending.shift(); index !== undefined; index = pending.shift()) {
+      await putChunk(session, file, index);
+    }
+  };
+  await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+
+  const { data } = await apiClient.post(`/files/uploads/${session.upload_id}/complete`);
+  localStorage.removeItem(resumeKey(file));
+  return data;
+}
 
 export async function uploadFile(file: File): Promise<FileAttachment> {
-  const formData = new FormData();
-  formData.append('file', file);
-  const { data } = await apiClient.post('/files/upload', formData, {
-    headers: { 'Content-Type': 'multipart/form-data' },
+  const existing = await dedupeFile(file);
+  if (existing) return existing;
+  if (file.size >= RESUMABLE_MIN_SIZE) return uploadResumable(file);
+
+  // Raw body: the server streams it straight to storage without multipart spooling
+  const { data } = await apiClient.post('/files/upload/raw', file, {
+    params: { filename: file.name },
+    headers: { 'Content-Type': file.type || 'application/octet-stream' },
   });
   return data;
 }
 
-export function getFileDownloadUrl(fileId: string): string {
+// variant 'preview': downscaled JPEG of an image (the original until it is rendered)
+export function getFileDownloadUrl(fileId: string, variant?: 'preview'): string {
   const serverUrl = localStorage.getItem('SERVER_URL');
   const token = localStorage.getItem('access_token');
-  return `http://${serverUrl}/api/files/${fileId}?token=${token}`;
+  const base = serverUrl ? `http://${serverUrl}` : '';
+  const query = variant ? `&variant=${variant}` : '';
+  return `${base}/api/files/${fileId}?token=${token}${query}`;
 }
@@ -1,13 +1,14 @@
 import apiClient from './client';
-import { Message } from '../types';
+import { MessagePage } from '../types';
 
 export async function getMessages(
   groupId: string,
-  before?: string,
+  cursor?: { before?: string; after?: string },
   limit: number = 50
-): Promise<Message[]> {
+): Promise<MessagePage> {
   const params: Record<string, string | number> = { limit };
-  if (before) params.before = before;
+  if (cursor?.before) params.before = cursor.before;
+  if (cursor?.after) params.after = cursor.after;
   const { data } = await apiClient.get(`/messages/${groupId}`, { params });
   return data;
 }
@@ -64,9 +64,19 @@ export default function MessageBubble({ message, isOwn }: MessageBubbleProps) {
                   rel="noopener noreferrer"
                 >
                   <img
-                    src={getFileDownloadUrl(message.file_attachment.id)}
+                    src={getFileDownloadUrl(message.file_attachment.id, 'preview')}
                     alt={message.file_attachment.original_filename}
-                    className="max-w-full rounded-lg max-h-60 object-cover"
+                    width={message.file_attachment.width ?? undefined}
+                    height={message.file_attachment.height ?? undefined}
+                    style={
+                      message.file_attachment.placeholder
+                        ? {
+                            backgroundImage: `url(${message.file_attachment.placeholder})`,
+                            backgroundSize: 'cover',
+                          }
+                        : undefined
+                    }
+                    className="max-w-full h-auto rounded-lg max-h-60 object-cover"
                     loading="lazy"
                   />
                 </a>
@@ -23,7 +23,7 @@ export default function ChatArea({ onSend }: ChatAreaProps) {
     if (!activeGroupId) return;
 
     getMessages(activeGroupId)
-      .then((msgs) => setMessages(activeGroupId, msgs))
+      .then((page) => setMessages(activeGroupId, page.messages))
       .catch(console.error);
 
     getGroupDetail(activeGroupId)
@@ -14,9 +14,10 @@ interface ChatState {
   addMessage: (message: Message) => void;
   setMessages: (groupId: string, messages: Message[]) => void;
   prependMessages: (groupId: string, messages: Message[]) => void;
+  appendMissedMessages: (groupId: string, messages: Message[]) => void;
   setUserOnline: (userId: string, isOnline: boolean) => void;
   setOnlineUserIds: (ids: string[]) => void;
-  setUserTyping: (groupId: string, userId: string, isTyping: boolean) => void;
+  setTypingUsers: (groupId: string, userIds: string[]) => void;
 }
 
 export const useChatStore = create<ChatState>((set) => ({
@@ -61,6 +62,21 @@ export const useChatStore = create<ChatState>((set) => ({
       };
     }),
 
+  appendMissedMessages: (groupId, messages) =>
+    set((state) => {
+      const existing = state.messages[groupId] || [];
+      // Live messages may have landed before the sync reply; merge by id
+      const known = new Set(existing.map((m) => m.id));
+      const missed = messages.filter((m) => !known.has(m.id));
+      if (!missed.length) return state;
+      return {
+        messages: {
+          ...state.messages,
+          [groupId]: [...existing, ...missed].sort((a, b) => a.seq - b.seq),
+        },
+      };
+    }),
+
   setUserOnline: (userId, isOnline) =>
     set((state) => {
       const newSet = new Set(state.onlineUserIds);
@@ -71,13 +87,8 @@ export const useChatStore = create<ChatState>((set) => ({
 
   setOnlineUserIds: (ids) => set({ onlineUserIds: new Set(ids) }),
 
-  setUserTyping: (groupId, userId, isTyping) =>
-    set((state) => {
-      const groupTyping = new Set(state.typingUsers[groupId] || []);
-      if (isTyping) groupTyping.add(userId);
-      else groupTyping.delete(userId);
-      return {
-        typingUsers: { ...state.typingUsers, [groupId]: groupTyping },
-      };
-    }),
+  setTypingUsers: (groupId, userIds) =>
+    set((state) => ({
+      typingUsers: { ...state.typingUsers, [groupId]: new Set(userIds) },
+    })),
 }));
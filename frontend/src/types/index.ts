@@ -23,11 +23,24 @@ export interface FileAttachment {
   original_filename: string;
   file_size: number;
   mime_type: string;
+  width?: number | null;
+  height?: number | null;
+  placeholder?: string | null;
+}
+
+export interface UploadSession {
+  upload_id: string;
+  file_size: number;
+  chunk_size: number;
+  received_chunks: number[];
+  received_bytes: number;
+  expires_at: string;
 }
 
 export interface Message {
   id: string;
   group_id: string;
+  seq: number;
   sender_id: string | null;
   sender?: User | null;
   content: string | null;
@@ -36,6 +49,20 @@ export interface Message {
   file_attachment: FileAttachment | null;
 }
 
+export interface MessagePage {
+  messages: Message[];
+  older_cursor: string | null;
+  newer_cursor: string | null;
+  has_older: boolean;
+  has_newer: boolean;
+}
+
+export interface GroupSync {
+  group_id: string;
+  messages: Message[];
+  has_more: boolean;
+}
+
 export interface AuthResponse {
   access_token: string;
   token_type: string;
@@ -0,0 +1,39 @@
+import {
+  decode,
+  decodeTimestampExtension,
+  encode,
+  EXT_TIMESTAMP,
+  ExtensionCodec,
+} from '@msgpack/msgpack';
+
+// Offered to the server in order of preference; it takes the first it speaks
+export const MSGPACK_PROTOCOL = 'lanchat.msgpack';
+export const JSON_PROTOCOL = 'lanchat.json';
+
+const EXT_UUID = 1;
+
+// Turn the server's compact UUIDs and timestamps back into the strings the
+// rest of the app expects, so JSON and MessagePack events look the same.
+const extensionCodec = new ExtensionCodec();
+extensionCodec.register({
+  type: EXT_UUID,
+  encode: () => null,
+  decode: (data: Uint8Array) => {
+    const hex = Array.from(data, (b) => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+  },
+});
+extensionCodec.register({
+  type: EXT_TIMESTAMP,
+  encode: () => null,
+  decode: (data: Uint8Array) => (decodeTimestampExtension(data) as Date).toISOString(),
+});
+
+export function decodeFrame(data: string | ArrayBuffer): any {
+  if (typeof data === 'string') return JSON.parse(data);
+  return decode(new Uint8Array(data), { extensionCodec });
+}
+
+export function encodeFrame(binary: boolean, data: unknown): string | Uint8Array {
+  return binary ? encode(data) : JSON.stringify(data);
+}
@@ -1,26 +1,53 @@
 import { useEffect, useRef, useCallback } from 'react';
 import { useChatStore } from '../stores/chatStore';
 import { useAuthStore } from '../stores/authStore';
+import { GroupSync } from '../types';
+import { decodeFrame, encodeFrame, JSON_PROTOCOL, MSGPACK_PROTOCOL } from './codec';
+
+// Highest seq held per loaded group; the server replies with only what is newer
+function syncCursors(): Record<string, number> {
+  const cursors: Record<string, number> = {};
+  for (const [groupId, msgs] of Object.entries(useChatStore.getState().messages)) {
+    if (msgs.length) cursors[groupId] = msgs[msgs.length - 1].seq;
+  }
+  return cursors;
+}
 
 export function useWebSocket() {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimeout = useRef<number | null>(null);
-  const { addMessage, setUserOnline, setUserTyping } = useChatStore();
+  // Commands issued in the same tick go out together as one array frame
+  const outbox = useRef<Record<string, unknown>[]>([]);
+  const { addMessage, appendMissedMessages, setUserOnline, setTypingUsers } = useChatStore();
   const token = useAuthStore((s) => s.token);
   const serverUrl = useAuthStore((s) => s.serverUrl);
 
   const connect = useCallback(() => {
     if (!serverUrl || !token) return;
 
-    const ws = new WebSocket(`ws://${serverUrl}/ws?token=${token}`);
+    // batch=1: the server packs events into array frames. JSON goes first
+    // while msgpack still encodes slower server-side (scripts/bench_ws_codecs).
+    const ws = new WebSocket(`ws://${serverUrl}/ws?token=${token}&batch=1`, [
+      JSON_PROTOCOL,
+      MSGPACK_PROTOCOL,
+    ]);
+    ws.binaryType = 'arraybuffer';
+    const send = (data: unknown) => ws.send(encodeFrame(ws.protocol === MSGPACK_PROTOCOL, data));
 
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+    ws.onopen = () => {
+      const cursors = syncCursors();
+      if (Object.keys(cursors).length) {
+        send({ type: 'sync', cursors });
+      }
+    };
+
+    const handleEvent = (data: any) => {
       switch (data.type) {
         case 'chat_message':
           addMessage({
             id: data.id,
             group_id: data.group_id,
+            seq: data.seq,
             sender_id: data.sender_id,
             sender: data.sender,
             content: data.content,
@@ -29,30 +56,55 @@ export function useWebSocket() {
             file_attachment: data.file_attachment,
           });
           break;
+        case 'sync': {
+          const cursors: Record<string, number> = {};
+          for (const group of data.groups as GroupSync[]) {
+            appendMissedMessages(group.group_id, group.messages);
+            if (group.has_more) {
+              cursors[group.group_id] = group.messages[group.messages.length - 1].seq;
+            }
+          }
+          if (Object.keys(cursors).length) {
+            send({ type: 'sync', cursors });
+          }
+          break;
+        }
         case 'user_status':
           setUserOnline(data.user_id, data.is_online);
           break;
         case 'typing':
-          setUserTyping(data.group_id, data.user_id, data.is_typing);
-          // Auto-clear typing after 3 seconds
-          setTimeout(() => {
-            setUserTyping(data.group_id, data.user_id, false);
-          }, 3000);
+          // Full list of who is typing; the server expires idle typists
+          setTypingUsers(data.group_id, data.user_ids);
           break;
       }
     };
 
+    ws.onmessage = (event) => {
+      const data = decodeFrame(event.data);
+      if (Array.isArray(data)) data.forEach(handleEvent);
+      else handleEvent(data);
+    };
+
     ws.onclose = () => {
       reconnectTimeout.current = window.setTimeout(connect, 3000);
     };
 
     wsRef.current = ws;
-  }, [token, serverUrl, addMessage, setUserOnline, setUserTyping]);
+  }, [token, serverUrl, addMessage, appendMissedMessages, setUserOnline, setTypingUsers]);
 
   const sendMessage = useCallback((data: Record<string, unknown>) => {
-    if (wsRef.current?.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify(data));
-    }
+    if (wsRef.current?.readyState !== WebSocket.OPEN) return;
+    outbox.current.push(data);
+    if (outbox.current.length > 1) return;
+    queueMicrotask(() => {
+      const commands = outbox.current;
+      outbox.current = [];
+      const ws = wsRef.current;
+      if (ws?.readyState === WebSocket.OPEN) {
+        const binary = ws.protocol === MSGPACK_PROTOCOL;
+        ws.send(encodeFrame(binary, commands.length === 1 ? commands[0] : commands));
+      }
+    });
   }, []);
 
   const joinRoom = useCallback((groupId: string) => {